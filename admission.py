@@ -0,0 +1,263 @@
+"""Admission control: LLM call limits, request priorities and per-client quotas.
+
+Every LLM call made through the pool takes a slot from one process-wide
+LLMLimiter, which caps concurrent calls and (optionally) their rate with a
+token bucket. Waiting calls are served in priority order, so an interactive
+interview from the web UI overtakes API and batch work when Gemini is the
+bottleneck. The priority of the calls a run makes is bound with priority()
+and follows the run into its stage and answer-batch threads.
+"""
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+PRIORITIES = {'interactive': 0, 'api': 1, 'batch': 2}
+DEFAULT_PRIORITY = 'api'
+
+# Only honour X-Forwarded-For when a reverse proxy in front of the app sets it
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', '').lower() in ('1', 'true', 'yes')
+
+LLM_SLOT_WAIT_SECONDS = metrics.Histogram('llm_slot_wait_seconds', 'Time LLM calls wait for the global limiter',
+                                          ['priority'])
+LLM_RATE_LIMIT_PAUSES = metrics.Counter('llm_rate_limit_pauses_total',
+                                        'Times LLM calls were paused after a provider rate-limit error')
+ADMISSION_REJECTIONS = metrics.Counter('admission_rejections_total', 'Requests refused with 429, by reason',
+                                       ['reason'])
+
+
+class AdmissionError(Exception):
+    """Raised when work is refused; retry_after is a suggested wait in seconds (None if unknown)"""
+
+    def __init__(self, message, retry_after=None, reason=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+        if reason:
+            ADMISSION_REJECTIONS.inc(reason=reason)
+
+
+class QuotaExceededError(AdmissionError):
+    """Raised when a client has used up its request quota"""
+
+
+_current_priority = contextvars.ContextVar('current_priority', default=DEFAULT_PRIORITY)
+
+
+@contextmanager
+def priority(name):
+    """Run the block's LLM calls at the given priority ('interactive', 'api' or 'batch')"""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority {name!r}, expected one of {sorted(PRIORITIES)}")
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most capacity (not thread-safe; callers lock)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, n=1):
+        """Take n tokens and return 0, or return the seconds until they are available"""
+        self._refill()
+        if self.tokens >= n:
+            self.tokens -= n
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+
+class LLMLimiter:
+    """Caps concurrent LLM calls and their rate; waiting calls are served by priority, then arrival.
+
+    rate_per_minute of 0 disables the rate limit. pause() holds every call
+    back for a while, e.g. after the provider answered 429.
+    """
+
+    def __init__(self, max_concurrency=8, rate_per_minute=0, burst=None, timeout=300):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate_per_minute / 60, burst or self.max_concurrency) if rate_per_minute else None
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._in_use = 0
+        self._paused_until = 0.0
+        self._counters = {'calls': 0, 'waited': 0, 'timeouts': 0, 'pauses': 0}
+
+    def _ready(self, entry):
+        """Seconds until entry may run, or None to wait for a notify (caller holds the lock)"""
+        if self._waiting[0] != entry or self._in_use >= self.max_concurrency:
+            return None
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        return self._bucket.take() if self._bucket is not None else 0.0
+
+    def acquire(self, priority_name=None):
+        priority_name = priority_name or current_priority()
+        entry = (PRIORITIES[priority_name], next(self._sequence))
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout else None
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    wait = self._ready(entry)
+                    if wait == 0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._counters['timeouts'] += 1
+                            raise AdmissionError(f"Timed out after {self.timeout}s waiting for an LLM slot",
+                                                 retry_after=30, reason='llm_slot_timeout')
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._in_use += 1
+            self._counters['calls'] += 1
+            waited = time.monotonic() - start
+            if waited > 0.001:
+                self._counters['waited'] += 1
+            # The next waiter may be able to run too
+            self._cond.notify_all()
+        LLM_SLOT_WAIT_SECONDS.observe(waited, priority=priority_name)
+        metrics.add_span('llm_slot_wait', waited)
+
+    def release(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority_name=None):
+        self.acquire(priority_name)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def pause(self, seconds):
+        """Hold back all calls for seconds (e.g. after a provider rate-limit response)"""
+        with self._cond:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._counters['pauses'] += 1
+                LLM_RATE_LIMIT_PAUSES.inc()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats['in_use'] = self._in_use
+            stats['waiting'] = len(self._waiting)
+            stats['max_concurrency'] = self.max_concurrency
+            stats['paused_seconds'] = round(max(0.0, self._paused_until - time.monotonic()), 3)
+        return stats
+
+
+class ClientQuotas:
+    """Per-client request rate limits (a token bucket per client)"""
+
+    def __init__(self, rate_per_minute=30, burst=None, max_clients=10000):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst or max(1, rate_per_minute // 6)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client, cost=1):
+        """Count a request for client; raises QuotaExceededError when it is over its rate
+
+        A request costing more than the burst (a large batch) needs the client's full allowance.
+        """
+        if not self.rate_per_minute or client is None:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate_per_minute / 60, self.burst)
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+            wait = bucket.take(min(cost, bucket.capacity))
+        if wait:
+            raise QuotaExceededError(f"Too many requests, limit is {self.rate_per_minute} per minute",
+                                     retry_after=math.ceil(wait), reason='client_rate')
+
+
+def client_address(remote_addr, forwarded_for=None):
+    """The requesting client: the first X-Forwarded-For hop behind a trusted proxy, else the peer address"""
+    if forwarded_for and TRUST_PROXY_HEADERS:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr
+
+
+_default_limiter = None
+_default_quotas = None
+_default_prefetch_quotas = None
+_defaults_lock = threading.Lock()
+
+
+def get_limiter():
+    """Return the process-wide LLM limiter, creating it on first use"""
+    global _default_limiter
+    with _defaults_lock:
+        if _default_limiter is None:
+            _default_limiter = LLMLimiter(
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+                rate_per_minute=float(os.getenv('LLM_RATE_LIMIT_RPM', '0')),
+                burst=int(os.getenv('LLM_RATE_BURST', '0')) or None,
+                timeout=float(os.getenv('LLM_SLOT_TIMEOUT', '300')),
+            )
+        return _default_limiter
+
+
+def get_client_quotas():
+    """Return the process-wide per-client quotas, creating them on first use"""
+    global _default_quotas
+    with _defaults_lock:
+        if _default_quotas is None:
+            _default_quotas = ClientQuotas(rate_per_minute=int(os.getenv('CLIENT_RATE_PER_MINUTE', '30')),
+                                           burst=int(os.getenv('CLIENT_RATE_BURST', '0')) or None)
+        return _default_quotas
+
+
+def get_prefetch_quotas():
+    """Return the per-client quotas for GitHub prefetches, kept apart so they never use up interview requests"""
+    global _default_prefetch_quotas
+    with _defaults_lock:
+        if _default_prefetch_quotas is None:
+            _default_prefetch_quotas = ClientQuotas(rate_per_minute=int(os.getenv('PREFETCH_RATE_PER_MINUTE', '20')),
+                                                    burst=int(os.getenv('PREFETCH_RATE_BURST', '0')) or None)
+        return _default_prefetch_quotas
@@ -1,331 +1,474 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, stream_with_context
 import os
-import time
-import requests
+import signal
+import sys
+import threading
 from dotenv import load_dotenv
-from crewai import Agent, Task, Crew, LLM
 import json
 from datetime import datetime
+from job_queue import JobQueue
+import pipeline
+from pipeline import STAGES, llm_cache, llm_router, run_interview_automation
+import github_client
+import question_bank
+import admission
+import checkpoints
+import metrics
+import result_export
+from result_store import get_store, hash_inputs
+from resume_extract import ResumeError, get_extractor, resume_max_bytes
+from batch import batch_job, validate_batch
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
+# Resume upload limit plus room for the text fields sent with it
+app.config['MAX_CONTENT_LENGTH'] = resume_max_bytes() + 1024 * 1024
 
-def fetch_github_data(github_url):
-    """Fetch real data from GitHub profile"""
-    try:
-        # Extract username from GitHub URL
-        username = github_url.split('/')[-1]
-        
-        # GitHub API endpoints
-        user_url = f"https://api.github.com/users/{username}"
-        repos_url = f"https://api.github.com/users/{username}/repos?sort=updated&per_page=10"
-        
-        # Fetch user profile
-        user_response = requests.get(user_url)
-        repos_response = requests.get(repos_url)
-        
-        if user_response.status_code == 200 and repos_response.status_code == 200:
-            user_data = user_response.json()
-            repos_data = repos_response.json()
-            
-            # Extract relevant information
-            github_info = {
-                'name': user_data.get('name', 'Not provided'),
-                'bio': user_data.get('bio', 'No bio available'),
-                'public_repos': user_data.get('public_repos', 0),
-                'followers': user_data.get('followers', 0),
-                'following': user_data.get('following', 0),
-                'company': user_data.get('company', 'Not specified'),
-                'location': user_data.get('location', 'Not specified'),
-                'blog': user_data.get('blog', 'No blog'),
-                'created_at': user_data.get('created_at', ''),
-                'updated_at': user_data.get('updated_at', ''),
-                'top_repositories': []
-            }
-            
-            # Extract top repositories info
-            for repo in repos_data[:5]:  # Top 5 repos
-                repo_info = {
-                    'name': repo.get('name', ''),
-                    'description': repo.get('description', 'No description'),
-                    'language': repo.get('language', 'Not specified'),
-                    'stars': repo.get('stargazers_count', 0),
-                    'forks': repo.get('forks_count', 0),
-                    'updated_at': repo.get('updated_at', ''),
-                    'topics': repo.get('topics', [])
-                }
-                github_info['top_repositories'].append(repo_info)
-            
-            return github_info
-        else:
-            return {'error': f"Failed to fetch GitHub data. Status codes: User={user_response.status_code}, Repos={repos_response.status_code}"}
-            
-    except Exception as e:
-        return {'error': f"Error fetching GitHub data: {str(e)}"}
-
-def create_llm_with_retry():
-    """Create LLM with retry logic for service unavailable errors"""
-    for attempt in range(3):
-        try:
-            llm = LLM(
-                model="gemini/gemini-1.5-flash",
-                api_key=os.getenv("GOOGLE_API_KEY")
-            )
-            return llm
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(5 * (attempt + 1))
-            else:
-                return LLM(model="gemini/gemini-1.5-flash")
-
-def format_interview_result(result_text):
-    """Format the interview result for better readability"""
-    formatted_result = f"""
-INTERVIEW SIMULATION RESULTS
-{'='*50}
+# Background workers that run the interview pipeline off the request threads
+job_queue = JobQueue(
+    workers=int(os.getenv('JOB_WORKERS', '2')),
+    max_queue=int(os.getenv('JOB_QUEUE_SIZE', '20')),
+    job_ttl=int(os.getenv('JOB_TTL_SECONDS', '3600')),
+    max_wait=float(os.getenv('JOB_MAX_WAIT_SECONDS', '300')),
+    max_active_per_client=int(os.getenv('CLIENT_MAX_ACTIVE_JOBS', '3')),
+)
+# Seconds in-flight jobs are given to finish when the server stops
+SHUTDOWN_TIMEOUT = float(os.getenv('JOB_SHUTDOWN_TIMEOUT', '600'))
+job_queue.install_shutdown_hook(timeout=SHUTDOWN_TIMEOUT)
 
-This simulation contains both interview questions and candidate responses.
-The format shows: Q: [Question] followed by A: [Answer]
+metrics.Gauge('job_queue_depth', 'Jobs waiting for a worker', fn=lambda: job_queue.stats()['queued'])
+metrics.Gauge('jobs_running', 'Jobs currently being processed', fn=lambda: job_queue.stats()['running'])
+metrics.Gauge('llm_pool_clients_in_use', 'Pooled LLM clients currently borrowed',
+              fn=lambda: llm_router.stats()['in_use'])
+metrics.Gauge('llm_calls_in_flight', 'LLM calls holding a limiter slot',
+              fn=lambda: admission.get_limiter().stats()['in_use'])
+metrics.Gauge('llm_calls_waiting', 'LLM calls waiting for a limiter slot',
+              fn=lambda: admission.get_limiter().stats()['waiting'])
 
-{'='*50}
+# Fields of an interview request; resume_text may instead come from a resume_file upload
+INTERVIEW_FIELDS = ('recruiter_text', 'resume_text', 'github_url', 'job_description')
 
-{result_text}
+# Largest number of candidates accepted by a single /api/batch request
+BATCH_MAX_CANDIDATES = int(os.getenv('BATCH_MAX_CANDIDATES', '100'))
 
-{'='*50}
-SIMULATION COMPLETE
-"""
-    return formatted_result
-
-def run_interview_automation(recruiter_text, resume_text, github_url, job_description):
-    """Run the interview automation process"""
-    try:
-        # Fetch real GitHub data
-        print("🔍 Fetching GitHub profile data...")
-        github_data = fetch_github_data(github_url)
-        if 'error' in github_data:
-            print(f"⚠️ Warning: {github_data['error']}")
-            github_info_text = f"GitHub URL: {github_url} (Could not fetch live data)"
-        else:
-            print("✅ GitHub data fetched successfully!")
-            github_info_text = f"""
-REAL GITHUB PROFILE DATA for {github_url}:
-
-Personal Info:
-- Name: {github_data['name']}
-- Bio: {github_data['bio']}
-- Company: {github_data['company']}
-- Location: {github_data['location']}
-- Blog: {github_data['blog']}
-- Public Repositories: {github_data['public_repos']}
-- Followers: {github_data['followers']}
-- Following: {github_data['following']}
-- Account Created: {github_data['created_at']}
-
-Top 5 Recent Repositories:
-"""
-            for i, repo in enumerate(github_data['top_repositories'], 1):
-                github_info_text += f"""
-{i}. {repo['name']} ({repo['language']})
-   - Description: {repo['description']}
-   - Stars: {repo['stars']}, Forks: {repo['forks']}
-   - Topics: {', '.join(repo['topics']) if repo['topics'] else 'None'}
-   - Last Updated: {repo['updated_at']}
-"""
-
-        # Create LLM
-        llm = create_llm_with_retry()
-        
-        # Create agents
-        recruiter_agent = Agent(
-            role="Recruiter Research Analyst",
-            goal="Analyze recruiter input and generate a recruiter personality profile",
-            backstory="Expert at profiling recruiters to simulate their interview style.",
-            llm=llm,
-            verbose=False,
-        )
-
-        candidate_agent = Agent(
-            role="Candidate Research Analyst",
-            goal="Analyze GitHub and resume to generate a candidate profile",
-            backstory="Expert in analyzing resumes and GitHub profiles to identify strengths and skills.",
-            llm=llm,
-            verbose=False,
-        )
-
-        interviewer_agent = Agent(
-            role="Mock Interviewer",
-            goal="Generate a list of questions based on the recruiter and candidate profiles",
-            backstory="Simulates the recruiter and prepares technical interview questions tailored to the job.",
-            llm=llm,
-            verbose=False,
-        )
-
-        candidate_mock_agent = Agent(
-            role="Mock Candidate",
-            goal="Answer interview questions in the tone of the candidate",
-            backstory="Simulates the candidate and answers interview questions accurately and concisely.",
-            llm=llm,
-            verbose=False,
-        )
-
-        # Create tasks
-        recruiter_task = Task(
-            description=f"Create a personality profile for the recruiter based on: {recruiter_text}",
-            expected_output="A detailed recruiter character profile based on traits, style, and values.",
-            agent=recruiter_agent
-        )
-
-        candidate_task = Task(
-            description=f"""
-            Given the following resume:\n{resume_text}\n\n
-            and REAL GitHub profile data:\n{github_info_text}\n\n
-            
-            Analyze the candidate's technical skills, programming languages, project experience, and coding patterns based on their actual GitHub repositories and activity.
-            Pay attention to:
-            - Programming languages used in repositories
-            - Project complexity and diversity
-            - Repository descriptions and topics
-            - Community engagement (stars, forks)
-            - Recent activity and consistency
-            
-            Generate a comprehensive candidate profile.
-            """,
-            expected_output="Detailed candidate profile based on resume and REAL GitHub data including technical skills, project analysis, and communication style.",
-            agent=candidate_agent
-        )
-
-        interview_task = Task(
-            description=f"""
-            Generate 15-20 comprehensive interview questions for this job position:
-            
-            Job Description: {job_description}
-            
-            Create questions in these categories:
-            1. Technical Skills (5-6 questions)
-            2. Problem Solving & System Design (3-4 questions)  
-            3. Experience & Projects (3-4 questions)
-            4. Behavioral & Cultural Fit (2-3 questions)
-            5. Role-Specific Scenarios (2-3 questions)
-            
-            Format each question clearly and number them. Tailor the difficulty and style to match the recruiter's approach and the candidate's experience level.
-            """,
-            expected_output="A numbered list of 15-20 well-structured interview questions organized by category.",
-            agent=interviewer_agent,
-            context=[recruiter_task, candidate_task]
-        )
-
-        answer_task = Task(
-            description="""
-            For each interview question generated above, provide both the QUESTION and the ANSWER in this format:
-            
-            **Q: [Question number]. [Full question text]**
-            
-            **A:** [Detailed answer in the candidate's style]
-            
-            Make sure to include both the original questions and the candidate's responses for a complete interview simulation.
-            """,
-            expected_output="Complete interview Q&A pairs with questions clearly stated followed by detailed candidate responses.",
-            agent=candidate_mock_agent,
-            context=[interview_task, candidate_task]
-        )
-
-        # Create and run crew
-        crew = Crew(
-            agents=[recruiter_agent, candidate_agent, interviewer_agent, candidate_mock_agent],
-            tasks=[recruiter_task, candidate_task, interview_task, answer_task],
-            verbose=False
-        )
-
-        result = crew.kickoff()
-        formatted_result = format_interview_result(str(result))
-        return {"success": True, "result": formatted_result}
-        
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+# Optionally import crewai in the background so the first interview does not pay for it
+if os.getenv('PIPELINE_PRELOAD', '').lower() in ('1', 'true', 'yes'):
+    threading.Thread(target=pipeline.preload, name='pipeline-preload', daemon=True).start()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def save_resume_upload():
+    """Save the request's resume_file upload, if any, for extraction in the job"""
+    upload = request.files.get('resume_file')
+    if upload is None or not upload.filename:
+        return None
+    return get_extractor().save_upload(upload.filename, upload.stream)
+
+def generate_and_save(recruiter_text, resume_text, github_url, job_description, progress_callback=None,
+                      use_cache=True, resume_file=None):
+    """Job body for the web form and API: run the automation and store the result
+
+    An uploaded resume_file replaces resume_text once its text is extracted.
+    """
+    if resume_file is not None:
+        print(f"📄 Extracting text from {resume_file.filename}...")
+        try:
+            resume_text = get_extractor().extract(resume_file)
+        except ResumeError as e:
+            return {'success': False, 'error': str(e)}
+    result = run_interview_automation(recruiter_text, resume_text, github_url, job_description,
+                                      progress_callback=progress_callback, use_cache=use_cache)
+    if result['success']:
+        inputs_hash = hash_inputs(recruiter_text=recruiter_text, resume_text=resume_text,
+                                  github_url=github_url, job_description=job_description)
+        try:
+            result['result_id'] = get_store().save(result['result'], inputs_hash, github_url=github_url,
+                                                   model=result.get('model'), timings=result.get('timings'),
+                                                   tokens=result.get('tokens'))
+        except Exception as e:
+            # A storage failure should not throw away a finished interview
+            print(f"⚠️ Warning: could not store result: {e}")
+        result['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return result
+
 @app.route('/generate', methods=['POST'])
 def generate_interview():
+    """Queue an interview from the web form at interactive priority
+
+    Redirects to the job's status page, or with Accept: application/json (the
+    form's streaming view) returns the job's links like POST /api/generate.
+    """
+    as_json = wants_json()
+
+    def fail(message, status=400, headers=None):
+        if as_json:
+            return jsonify({'success': False, 'error': message}), status, headers or {}
+        flash(message, 'error')
+        return redirect(url_for('index'))
+
     try:
+        client = request_client()
+        admission.get_client_quotas().check(client)
+        
         # Get form data
         recruiter_text = request.form.get('recruiter_text', '')
         resume_text = request.form.get('resume_text', '')
         github_url = request.form.get('github_url', '')
         job_description = request.form.get('job_description', '')
+        use_cache = not request.form.get('fresh')
         
         # Validate inputs
-        if not all([recruiter_text, resume_text, github_url, job_description]):
-            flash('Please fill in all fields', 'error')
-            return redirect(url_for('index'))
+        if not all([recruiter_text, github_url, job_description]):
+            return fail('Please fill in all fields')
+        resume_file = save_resume_upload()
+        if resume_file is None and not resume_text:
+            return fail('Please paste a resume or upload a PDF, DOCX or TXT file')
         
-        # Run the automation
-        result = run_interview_automation(recruiter_text, resume_text, github_url, job_description)
+        # Queue the automation and let the status page poll for it
+        job = queue_interview(request.form, use_cache, resume_file, priority='interactive', client=client)
+        if as_json:
+            return jsonify(job_links(job)), 202
+        return redirect(url_for('job_page', job_id=job.id))
         
-        if result['success']:
-            # Save result with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"interview_result_{timestamp}.txt"
-            filepath = os.path.join('results', filename)
-            
-            # Create results directory if it doesn't exist
-            os.makedirs('results', exist_ok=True)
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Interview Automation Result\n")
-                f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("="*50 + "\n\n")
-                f.write(result['result'])
-            
-            return render_template('result.html', 
-                                 result=result['result'], 
-                                 filename=filename,
-                                 timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        else:
-            flash(f'Error generating interview: {result["error"]}', 'error')
-            return redirect(url_for('index'))
-            
+    except admission.AdmissionError as e:
+        if as_json:
+            body, status, headers = rejection(e)
+            return fail(body['error'], status, headers)
+        retry = f' (retry in {e.retry_after}s)' if e.retry_after else ''
+        return fail(f'{e}{retry}')
+    except ResumeError as e:
+        return fail(str(e))
     except Exception as e:
-        flash(f'An error occurred: {str(e)}', 'error')
+        return fail(f'An error occurred: {str(e)}', 500)
+
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    """Show a queued interview: a progress page while running, the result once done"""
+    job = job_queue.get(job_id)
+    if job is None:
+        flash('Interview job not found or expired', 'error')
+        return redirect(url_for('index'))
+    
+    if job.fn is batch_job:
+        return redirect(url_for('api_job_status', job_id=job.id))
+    if job.status == 'completed':
+        return render_template('result.html', 
+                             result=job.result['result'], 
+                             timestamp=job.result.get('timestamp', job.finished_at))
+    if job.done:
+        flash(f'Error generating interview: {job.error}', 'error')
         return redirect(url_for('index'))
+    return render_template('job.html', job=job.to_dict())
+
+def request_client():
+    """Who is asking, for per-client quotas"""
+    return admission.client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+
+def wants_json():
+    """True when the client prefers a JSON response to an HTML page"""
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+def job_links(job):
+    """202 response body for a queued interview or batch"""
+    return {
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('api_job_status', job_id=job.id),
+        'events_url': url_for('api_job_events', job_id=job.id),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def rejection(e):
+    """JSON body, status and headers for refused work: 429 with Retry-After, or 503 when shutting down"""
+    if e.retry_after is None:
+        return {'success': False, 'error': str(e)}, 503, {}
+    return {'success': False, 'error': str(e), 'retry_after': e.retry_after}, 429, {'Retry-After': str(e.retry_after)}
+
+def queue_interview(data, use_cache, resume_file=None, priority=admission.DEFAULT_PRIORITY, client=None):
+    """Queue an interview from submitted fields, or return None if required fields are missing
+
+    Shared by the Flask views and the ASGI endpoints. A saved resume_file is
+    discarded when the job cannot be queued or an identical job is already
+    in flight, in which case that job is returned.
+    """
+    fields = {name: data.get(name, '') for name in INTERVIEW_FIELDS}
+    if (not all([fields['recruiter_text'], fields['github_url'], fields['job_description']])
+            or (resume_file is None and not fields['resume_text'])):
+        if resume_file is not None:
+            get_extractor().discard(resume_file)
+        return None
+    # Identical requests already in flight (double submits, client retries) share one job;
+    # an uploaded file replaces the pasted resume, so it is keyed by its content hash
+    key_fields = dict(fields, resume_text=resume_file.sha256) if resume_file is not None else fields
+    key = hash_inputs(use_cache=use_cache, resume_upload=resume_file is not None, **key_fields)
+    job = None
+    try:
+        job = job_queue.submit(generate_and_save, stages=STAGES, key=key, priority=priority, client=client,
+                               on_cancel=(lambda: get_extractor().discard(resume_file)) if resume_file else None,
+                               use_cache=use_cache, resume_file=resume_file, **fields)
+    finally:
+        if resume_file is not None and (job is None or job.kwargs['resume_file'] is not resume_file):
+            get_extractor().discard(resume_file)
+    return job
+
+def form_use_cache(form):
+    """use_cache from form fields: the web form's fresh checkbox or an API use_cache=false"""
+    return not form.get('fresh') and form.get('use_cache', 'true').lower() != 'false'
+
+def job_status_info(job):
+    """Status, per-stage progress and (once finished) the result of a job, as returned by the API"""
+    info = job.to_dict()
+    result = info.pop('result')
+    if job.status == 'completed':
+        info['result'] = result['result']
+        info['timings'] = result.get('timings')
+        info['tokens'] = result.get('tokens')
+        info['result_id'] = result.get('result_id')
+        info['question_bank'] = result.get('question_bank')
+        if job.fn is batch_job:
+            info['succeeded'] = result['succeeded']
+            info['failed'] = result['failed']
+    if result:
+        info['metrics'] = result.get('metrics')
+        info['checkpoint'] = result.get('checkpoint')
+    return info
+
+def format_event(event, result_url):
+    """One job event as a Server-Sent Events message"""
+    if event['type'] == 'finished':
+        event = dict(event, result_url=result_url)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+def events_cursor(last_event_id):
+    """First event id to send to an SSE client reconnecting with Last-Event-ID"""
+    return int(last_event_id) + 1 if last_event_id.isdigit() else 0
 
 @app.route('/api/generate', methods=['POST'])
 def api_generate_interview():
-    """API endpoint for generating interviews"""
+    """API endpoint for generating interviews
+
+    Accepts JSON, or multipart form data with the resume as a resume_file
+    upload (PDF, DOCX or TXT). Returns 202 with a job id immediately; poll
+    GET /api/jobs/<job_id> for the result.
+    """
     try:
-        data = request.get_json()
-        
-        recruiter_text = data.get('recruiter_text', '')
-        resume_text = data.get('resume_text', '')
-        github_url = data.get('github_url', '')
-        job_description = data.get('job_description', '')
+        client = request_client()
+        admission.get_client_quotas().check(client)
+        if request.mimetype == 'multipart/form-data':
+            data = request.form
+            use_cache = form_use_cache(data)
+            resume_file = save_resume_upload()
+        else:
+            data = request.get_json()
+            use_cache = data.get('use_cache', True) is not False
+            resume_file = None
         
-        if not all([recruiter_text, resume_text, github_url, job_description]):
+        job = queue_interview(data, use_cache, resume_file, priority='api', client=client)
+        if job is None:
             return jsonify({'success': False, 'error': 'Missing required fields'}), 400
-        
-        result = run_interview_automation(recruiter_text, resume_text, github_url, job_description)
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'result': result['result'],
-                'timestamp': datetime.now().isoformat()
-            })
-        else:
-            return jsonify({'success': False, 'error': result['error']}), 500
+        return jsonify(job_links(job)), 202
             
+    except ResumeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return jsonify(body), status, headers
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Status, per-stage progress and (once finished) the result of a queued job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify(job_status_info(job))
+
+@app.route('/api/jobs/<job_id>/events')
+def api_job_events(job_id):
+    """Server-Sent Events stream of a job's stage outputs as soon as they are produced"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    cursor = events_cursor(request.headers.get('Last-Event-ID', ''))
+    result_url = url_for('job_page', job_id=job.id)
+    
+    def stream(cursor):
+        yield "retry: 3000\n\n"
+        while True:
+            events = job.events_since(cursor, timeout=15)
+            if not events:
+                if job.done:
+                    return
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield format_event(event, result_url)
+            cursor = events[-1]['id'] + 1
+            if events[-1]['type'] == 'finished':
+                return
+    
+    return Response(stream_with_context(stream(cursor)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Queue a batch scoring many candidates against one job
+
+    Returns 202 with a job id immediately. Each candidate's record is sent
+    on the job's event stream as it completes; GET /api/jobs/<job_id> has
+    them all, in candidate order, once the batch is done.
+    """
+    data = request.get_json(silent=True)
+    error = validate_batch(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    if len(data['candidates']) > BATCH_MAX_CANDIDATES:
+        return jsonify({'success': False, 'error': f'At most {BATCH_MAX_CANDIDATES} candidates per batch'}), 400
+    try:
+        client = request_client()
+        admission.get_client_quotas().check(client, cost=len(data['candidates']))
+        use_cache = data.get('use_cache', True) is not False
+        key = hash_inputs(batch=True, use_cache=use_cache, recruiter_text=data['recruiter_text'],
+                          job_description=data['job_description'], candidates=data['candidates'])
+        job = job_queue.submit(batch_job, key=key, priority='batch', client=client,
+                               recruiter_text=data['recruiter_text'], job_description=data['job_description'],
+                               candidates=data['candidates'], use_cache=use_cache)
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return jsonify(body), status, headers
+    return jsonify(job_links(job)), 202
+
+@app.route('/api/github/prefetch', methods=['POST'])
+def api_github_prefetch():
+    """Start fetching a candidate's GitHub profile while the form is still being filled in"""
+    data = request.get_json(silent=True) or request.form
+    username = github_client.profile_username(data.get('github_url', ''))
+    if username is None:
+        return jsonify({'success': False, 'error': 'github_url is not a GitHub profile URL'}), 400
+    try:
+        admission.get_prefetch_quotas().check(request_client())
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return jsonify(body), status, headers
+    status = github_client.get_prefetcher().prefetch(username)
+    return jsonify({'success': True, 'username': username, 'status': status}), 202
+
+@app.route('/api/github')
+def api_github_stats():
+    """GitHub client rate limit and cache counters, and prefetch hit rate and time saved"""
+    return jsonify(dict(github_client.get_client().stats(), prefetch=github_client.get_prefetcher().stats()))
+
+@app.route('/api/results')
+def api_results():
+    """Stored interviews, newest first; page with ?cursor=, search with ?q="""
+    try:
+        page = get_store().list(limit=request.args.get('limit', 20, type=int),
+                                before=request.args.get('cursor', type=int),
+                                query=request.args.get('q'),
+                                inputs_hash=request.args.get('inputs_hash'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if page['next_cursor'] is not None:
+        args = dict(request.args, cursor=page['next_cursor'])
+        page['next_url'] = url_for('api_results', **args)
+    return jsonify(dict(page, success=True))
+
+def results_export(args):
+    """Chunks, content type and file name of an export of stored results (shared with asgi.py)
+
+    Raises ValueError for an unknown format or a malformed since/until date.
+    """
+    fmt = args.get('format') or 'jsonl'
+    records = get_store().iter_results(since=result_export.parse_time(args.get('since')),
+                                       until=result_export.parse_time(args.get('until'), end=True),
+                                       inputs_hash=args.get('inputs_hash'))
+    chunks = result_export.iter_export(records, fmt)
+    return chunks, result_export.FORMATS[fmt][1], result_export.export_filename(fmt)
+
+@app.route('/api/results/export')
+def api_results_export():
+    """Stream stored interviews as gzipped JSONL or a zip; filter with ?since=, ?until= and ?inputs_hash="""
+    try:
+        admission.get_client_quotas().check(request_client())
+        chunks, mimetype, filename = results_export(request.args)
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return jsonify(body), status, headers
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/results/<int:result_id>')
+def api_result(result_id):
+    """A stored interview with its full text"""
+    record = get_store().get(result_id)
+    if record is None:
+        return jsonify({'success': False, 'error': 'Result not found'}), 404
+    return jsonify(dict(record, success=True))
+
+@app.route('/api/cache')
+def api_cache_stats():
+    """LLM response cache hit/miss counters and occupancy"""
+    return jsonify(llm_cache.stats())
+
+@app.route('/api/resumes')
+def api_resume_stats():
+    """Resume upload, extraction and cache counters"""
+    return jsonify(get_extractor().stats())
+
+@app.route('/api/question-bank')
+def api_question_bank_stats():
+    """Question bank size, similarity threshold and reuse hit rate"""
+    return jsonify(question_bank.get_bank().stats())
+
+@app.route('/api/checkpoints')
+def api_checkpoint_stats():
+    """Stage checkpoints kept for failed runs, and how often retries resumed from them"""
+    return jsonify(checkpoints.get_store().stats())
+
+@app.route('/api/llm')
+def api_llm_stats():
+    """Model tiers and their health, and each model's client pool usage, retry counts and call latency"""
+    return jsonify(llm_router.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'jobs': job_queue.stats(),
+        'github': github_client.get_client().stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.errorhandler(413)
+def request_too_large(e):
+    message = f'Upload is larger than {resume_max_bytes() / (1024 * 1024):g} MB'
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'error': message}), 413
+    flash(message, 'error')
+    return redirect(url_for('index'))
+
+def handle_sigterm(signum, frame):
+    """Drain in-flight jobs, then exit normally"""
+    job_queue.shutdown(SHUTDOWN_TIMEOUT)
+    sys.exit(0)
 
 if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, handle_sigterm)
     app.run(debug=True, host='0.0.0.0', port=5000)
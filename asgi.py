@@ -0,0 +1,158 @@
+"""Async (ASGI) serving mode.
+
+The interview endpoints that clients hold open or poll - queueing an
+interview, job status and the Server-Sent Events stream - and bulk result
+exports are coroutines here, so thousands of idle connections or slow
+downloads cost an event-loop task each instead of a thread. Interviews still run on the job queue's worker threads, and
+every other route is served by the Flask app mounted underneath.
+
+    python asgi.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+# Not starlette's deprecated WSGIMiddleware, which buffers whole responses and so breaks streaming routes
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app
+import admission
+from app import (SHUTDOWN_TIMEOUT, events_cursor, form_use_cache, format_event, job_queue, job_status_info,
+                 queue_interview, rejection, results_export)
+from resume_extract import ResumeError, get_extractor
+
+_flask_urls = flask_app.url_map.bind('')
+
+
+def flask_path(endpoint, **values):
+    """URL path of a Flask route, so both apps hand out the same links"""
+    return _flask_urls.build(endpoint, values)
+
+
+async def api_generate_interview(request):
+    """Queue an interview from JSON or multipart form data and return 202 with the job id"""
+    length = request.headers.get('content-length', '')
+    if length.isdigit() and int(length) > flask_app.config['MAX_CONTENT_LENGTH']:
+        return JSONResponse({'success': False, 'error': 'Request body is too large'}, status_code=413)
+    try:
+        client = admission.client_address(request.client.host if request.client else None,
+                                          request.headers.get('x-forwarded-for'))
+        admission.get_client_quotas().check(client)
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            async with request.form() as form:
+                use_cache = form_use_cache(form)
+                upload = form.get('resume_file')
+                resume_file = None
+                if upload is not None and getattr(upload, 'filename', None):
+                    # Copy and hash the spooled upload off the event loop
+                    resume_file = await run_in_threadpool(get_extractor().save_upload, upload.filename, upload.file)
+                job = queue_interview(form, use_cache, resume_file, priority='api', client=client)
+        else:
+            data = await request.json()
+            job = queue_interview(data, data.get('use_cache', True) is not False, priority='api', client=client)
+        if job is None:
+            return JSONResponse({'success': False, 'error': 'Missing required fields'}, status_code=400)
+        return JSONResponse({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': flask_path('api_job_status', job_id=job.id),
+            'events_url': flask_path('api_job_events', job_id=job.id),
+            'timestamp': datetime.now().isoformat()
+        }, status_code=202)
+
+    except ResumeError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return JSONResponse(body, status_code=status, headers=headers)
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def api_job_status(request):
+    job = job_queue.get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'success': False, 'error': 'Job not found'}, status_code=404)
+    return JSONResponse(job_status_info(job))
+
+
+async def api_job_events(request):
+    """Server-Sent Events stream of a job's stage outputs, awaited on the event loop"""
+    job = job_queue.get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'success': False, 'error': 'Job not found'}, status_code=404)
+
+    cursor = events_cursor(request.headers.get('last-event-id', ''))
+    result_url = flask_path('job_page', job_id=job.id)
+
+    async def stream(cursor):
+        yield "retry: 3000\n\n"
+        while True:
+            events = await job.events_since_async(cursor, timeout=15)
+            if not events:
+                if job.done:
+                    return
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield format_event(event, result_url)
+            cursor = events[-1]['id'] + 1
+            if events[-1]['type'] == 'finished':
+                return
+
+    return StreamingResponse(stream(cursor), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def api_results_export(request):
+    """Stream stored interviews as gzipped JSONL or a zip archive"""
+    try:
+        admission.get_client_quotas().check(admission.client_address(request.client.host if request.client else None,
+                                                                     request.headers.get('x-forwarded-for')))
+        chunks, media_type, filename = results_export(request.query_params)
+    except admission.AdmissionError as e:
+        body, status, headers = rejection(e)
+        return JSONResponse(body, status_code=status, headers=headers)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    # Starlette pulls each chunk of a plain iterator on a worker thread, so reading the
+    # database and compressing stay off the event loop and no thread waits on a slow client
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Drain in-flight jobs while their thread pools still accept work; at interpreter exit it can be too late
+    await run_in_threadpool(job_queue.shutdown, SHUTDOWN_TIMEOUT)
+
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/api/generate', api_generate_interview, methods=['POST']),
+    Route('/api/jobs/{job_id}', api_job_status),
+    Route('/api/jobs/{job_id}/events', api_job_events),
+    Route('/api/results/export', api_results_export),
+    Mount('/', app=WSGIMiddleware(flask_app)),
+])
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # Jobs live in the memory of the process that queued them: with several
+    # workers, status and event requests must reach the same one (sticky sessions)
+    uvicorn.run('asgi:app',
+                host=os.getenv('HOST', '0.0.0.0'),
+                port=int(os.getenv('PORT', '5000')),
+                workers=int(os.getenv('ASGI_WORKERS', '1')),
+                limit_concurrency=int(os.getenv('ASGI_MAX_CONNECTIONS', '10000')),
+                timeout_keep_alive=int(os.getenv('ASGI_KEEP_ALIVE', '15')),
+                timeout_graceful_shutdown=SHUTDOWN_TIMEOUT)
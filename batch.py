@@ -0,0 +1,187 @@
+"""Score many candidates against one recruiter and job description in a single run.
+
+The recruiter profile and the question set depend only on the recruiter and
+the job, so they are generated once and shared; the GitHub fetch, candidate
+profile and answers are then fanned out across a bounded pool of workers.
+
+Usage:
+    python batch.py batch.json [-o results.jsonl] [--workers N] [--no-cache]
+
+where batch.json looks like:
+    {"recruiter_text": "...", "job_description": "...",
+     "candidates": [{"id": "alice", "resume_text": "...", "github_url": "..."}, ...]}
+"""
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import admission
+import metrics
+from dag import Stage, StageError, run_dag
+from llm_pool import LLMUnavailable
+from pipeline import (answer_questions, borrow_llms, find_question_set, format_interview_result,
+                      generate_candidate_profile, generate_questions, generate_recruiter_profile, instrument_stages,
+                      load_github_info, store_question_set)
+from token_budget import TokenAccounting
+
+DEFAULT_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+
+
+def validate_batch(data):
+    """Return an error message for a malformed batch request, or None"""
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object'
+    if not data.get('recruiter_text') or not data.get('job_description'):
+        return 'Missing required fields: recruiter_text and job_description'
+    candidates = data.get('candidates')
+    if not isinstance(candidates, list) or not candidates:
+        return 'candidates must be a non-empty list'
+    for i, candidate in enumerate(candidates):
+        if not isinstance(candidate, dict) or not candidate.get('resume_text') or not candidate.get('github_url'):
+            return f'Candidate {i} is missing resume_text or github_url'
+    return None
+
+
+def _candidate_record(index, candidate, **fields):
+    record = {'index': index, 'id': candidate.get('id', index), 'github_url': candidate.get('github_url')}
+    record.update(fields)
+    return record
+
+
+def run_candidate(llms, shared, candidate, accounting):
+    """Run the per-candidate stages against the shared recruiter profile and questions"""
+    stages = [
+        Stage('github', lambda inputs: load_github_info(candidate['github_url'])),
+        Stage('candidate_profile',
+              lambda inputs: generate_candidate_profile(llms['candidate_profile'], candidate['resume_text'],
+                                                        inputs['github'], accounting),
+              deps=['github']),
+        Stage('answers',
+              lambda inputs: answer_questions(llms['answers'], shared['questions'], inputs['candidate_profile'],
+                                              accounting),
+              deps=['candidate_profile']),
+    ]
+    record = metrics.RunRecord()
+    outputs, timings = run_dag(instrument_stages(stages, record))
+    return format_interview_result(outputs['answers']), timings, record.to_dict()
+
+
+def run_batch(recruiter_text, job_description, candidates, max_workers=None, use_cache=True):
+    """Yield one result record per candidate, in completion order
+
+    LLM calls run at batch priority, behind interactive and API interviews.
+    """
+    try:
+        with admission.priority('batch'), borrow_llms(use_cache=use_cache) as llms:
+            yield from _run_batch(llms, recruiter_text, job_description, candidates, max_workers, use_cache)
+    except LLMUnavailable as e:
+        print(f"❌ {e}")
+        for index, candidate in enumerate(candidates):
+            yield _candidate_record(index, candidate, success=False, error=str(e))
+
+
+def batch_job(recruiter_text, job_description, candidates, use_cache=True, progress_callback=None):
+    """Run a batch as a queued job: each record is reported as a 'candidate' event as it completes
+
+    The job result holds every record, in candidate order.
+    """
+    records = []
+    for record in run_batch(recruiter_text, job_description, candidates, use_cache=use_cache):
+        records.append(record)
+        if progress_callback:
+            progress_callback('candidate', 'partial', record)
+    records.sort(key=lambda record: record['index'])
+    return {
+        'success': True,
+        'result': records,
+        'succeeded': sum(1 for record in records if record['success']),
+        'failed': sum(1 for record in records if not record['success']),
+    }
+
+
+def _run_batch(llms,recruiter_text, job_description, candidates, max_workers, use_cache=True):
+    # Shared stages are accounted once; each candidate extends a copy of that record
+    shared_accounting = TokenAccounting()
+    reused = find_question_set(job_description, recruiter_text, use_cache)
+    if reused:
+        shared = {'recruiter_profile': reused['recruiter_profile'], 'questions': reused['questions']}
+        shared_timings = {}
+    else:
+        shared_stages = [
+            Stage('recruiter_profile',
+                  lambda inputs: generate_recruiter_profile(llms['recruiter_profile'], recruiter_text,
+                                                            shared_accounting)),
+            Stage('questions', lambda inputs: generate_questions(llms['questions'], job_description,
+                                                                 inputs['recruiter_profile'],
+                                                                 accounting=shared_accounting),
+                  deps=['recruiter_profile']),
+        ]
+        try:
+            shared, shared_timings = run_dag(instrument_stages(shared_stages, metrics.RunRecord()))
+        except StageError as e:
+            print(f"❌ Shared stage '{e.stage}' failed: {e}")
+            for index, candidate in enumerate(candidates):
+                yield _candidate_record(index, candidate, success=False, error=str(e), failed_stage=e.stage)
+            return
+        store_question_set(job_description, recruiter_text, shared['recruiter_profile'], shared['questions'])
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WORKERS)
+    accountings = [shared_accounting.copy() for _ in candidates]
+    futures = {executor.submit(contextvars.copy_context().run, run_candidate, llms, shared, candidate,
+                               accountings[index]): index
+               for index, candidate in enumerate(candidates)}
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            candidate = candidates[index]
+            try:
+                result, timings, run_metrics = future.result()
+            except StageError as e:
+                yield _candidate_record(index, candidate, success=False, error=str(e), failed_stage=e.stage)
+            except Exception as e:
+                yield _candidate_record(index, candidate, success=False, error=str(e))
+            else:
+                yield _candidate_record(index, candidate, success=True, result=result,
+                                        timings=dict(shared_timings, **timings),
+                                        tokens=accountings[index].report(), metrics=run_metrics)
+    except BaseException:
+        # The consumer went away (GeneratorExit) or failed: don't start candidates nobody will read
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate interview simulations for many candidates at once")
+    parser.add_argument('input', help="JSON file with recruiter_text, job_description and candidates")
+    parser.add_argument('-o', '--output', help="write JSONL results here instead of stdout")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="concurrent candidates")
+    parser.add_argument('--no-cache', action='store_true', help="force fresh LLM generations")
+    args = parser.parse_args()
+
+    with open(args.input, encoding='utf-8') as f:
+        data = json.load(f)
+    error = validate_batch(data)
+    if error:
+        parser.error(error)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        # Keep progress output off stdout so it stays valid JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            records = run_batch(data['recruiter_text'], data['job_description'], data['candidates'],
+                                max_workers=args.workers, use_cache=not args.no_cache)
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+"""Offline end-to-end throughput and latency benchmark.
+
+A deterministic stand-in LLM with configurable latency replaces Gemini and a
+local HTTP server plays the GitHub API, so the full pipeline runs behind the
+real HTTP endpoints without API keys, quota or network access:
+
+    python benchmarks/e2e.py --requests 40 --concurrency 8 --llm-latency 0.2
+    python benchmarks/e2e.py --save-baseline bench_baseline.json
+    python benchmarks/e2e.py --baseline bench_baseline.json --max-regression 0.15
+    python benchmarks/e2e.py --slow-model gemini/gemini-1.5-pro     # exercise model fallback
+
+Each request POSTs /api/generate and polls /api/jobs/<job_id> until the job
+finishes. Every input (recruiter text, resume and GitHub user) is unique per
+request, so every run misses the LLM and GitHub caches, and the question bank
+is off, unless --repeat-inputs is given. The LLM cache hit rate is reported.
+Caches, the result store, the question bank and stage checkpoints live in a
+temporary directory. App settings such as
+JOB_WORKERS or LLM_POOL_SIZE are read from the environment as usual.
+
+Exits non-zero if any request fails or, with --baseline, if a metric is worse
+than the baseline by more than --max-regression.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RECRUITER_TEXT = "Recruiter {suffix} from a fintech scale-up, values ownership and clear communication."
+JOB_DESCRIPTION = """
+Backend Engineer
+- Python and PostgreSQL
+- Designing and operating REST APIs
+- Experience with queues, caching and observability
+"""
+
+# Metrics compared against a baseline and whether a higher value is better
+COMPARED = {
+    'latency_p50_s': False,
+    'latency_p95_s': False,
+    'latency_p99_s': False,
+    'throughput_rps': True,
+    'peak_rss_mb': False,
+}
+
+
+class StubLLM:
+    """Deterministic stand-in for Gemini: canned responses shaped like each task's output"""
+
+    def __init__(self, latency=0.2, jitter=0.1, seed=0, questions=15, token_latency=0.0, slow_models=(),
+                 slow_factor=10.0, failing_models=()):
+        self.latency = latency
+        self.slow_models = set(slow_models)
+        self.slow_factor = slow_factor
+        self.failing_models = set(failing_models)
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.questions = questions
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency * (1 + spread))
+
+    def respond(self, messages):
+        prompt = str(messages[-1].get('content', '')) if messages else ''
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        if '**Q: [Question number]' in prompt:
+            # Answer exactly the numbered questions the prompt contains
+            numbers = list(dict.fromkeys(re.findall(r'^\s*(\d+)[.)] ', prompt, re.MULTILINE)))
+            body = "\n\n".join(f"**Q: {i}. How would you approach problem {i} ({digest})?**\n\n"
+                               f"**A:** I would start by measuring, then iterate on the design for case {i}."
+                               for i in numbers or range(1, self.questions + 1))
+        elif 'interview questions' in prompt:
+            body = "\n".join(f"{i}. How would you approach problem {i} ({digest})?"
+                             for i in range(1, self.questions + 1))
+        else:
+            body = (f"**Profile {digest}**\n- Communicates directly\n- Strong Python and API design\n"
+                    "- Values measurable outcomes\n")
+        return f"Thought: I now know the final answer\nFinal Answer: {body}"
+
+    def factory(self, model):
+        """LLM client factory for the pipeline's model router; slow and failing models are degraded"""
+        from crewai import LLM
+        from llm_pool import set_call
+        stub = self
+        llm = LLM(model=model, api_key='offline-benchmark')
+        factor = self.slow_factor if model in self.slow_models else 1.0
+
+        def call(messages, *args, **kwargs):
+            if model in stub.failing_models:
+                time.sleep(stub.delay())
+                raise RuntimeError(f"503 Service Unavailable: {model} is overloaded")
+            response = stub.respond(messages)
+            # Real models take longer the more they write
+            time.sleep((stub.delay() + len(response) / 4 * stub.token_latency) * factor)
+            return response
+
+        return set_call(llm, call)
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Minimal GitHub REST API: users, paged repos and per-repo languages, with ETags"""
+
+    latency = 0.05
+    repos = 10
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        params = dict(pair.split('=', 1) for pair in query.split('&') if '=' in pair)
+        if len(parts) == 2 and parts[0] == 'users':
+            body = {'login': parts[1], 'name': parts[1].title(), 'bio': 'Backend engineer', 'public_repos': self.repos,
+                    'followers': 42, 'following': 7, 'company': 'Example', 'location': 'Remote',
+                    'blog': '', 'created_at': '2018-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z'}
+        elif len(parts) == 3 and parts[0] == 'users' and parts[2] == 'repos':
+            per_page = int(params.get('per_page', 30))
+            first = (int(params.get('page', 1)) - 1) * per_page
+            body = [{'name': f"{parts[1]}-project-{i}", 'description': f"Service number {i}",
+                     'language': ('Python', 'Go', 'TypeScript')[i % 3], 'stargazers_count': i * 3,
+                     'forks_count': i, 'fork': i % 7 == 6, 'size': 100 + i * 10,
+                     'updated_at': '2024-01-01T00:00:00Z', 'pushed_at': '2024-01-01T00:00:00Z',
+                     'topics': ['api', 'backend']}
+                    for i in range(first, min(first + per_page, self.repos))]
+        elif len(parts) == 4 and parts[0] == 'repos' and parts[3] == 'languages':
+            index = int(parts[2].rsplit('-', 1)[-1])
+            body = {('Python', 'Go', 'TypeScript')[index % 3]: 40000 + index * 1000, 'Shell': 1200, 'Dockerfile': 300}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        etag = '"' + hashlib.sha256(payload).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', '5000')
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_request(index, repeat_inputs):
+    suffix = 0 if repeat_inputs else index
+    return {
+        'recruiter_text': RECRUITER_TEXT.format(suffix=suffix),
+        'resume_text': f"Candidate {suffix}: backend engineer with Python, PostgreSQL and Kubernetes experience.",
+        'github_url': f"https://github.com/bench-user-{suffix}",
+        'job_description': JOB_DESCRIPTION,
+    }
+
+
+def run_one(base_url, payload, poll_interval, timeout):
+    """Submit one interview and wait for it; returns a sample dict"""
+    session = requests.Session()
+    start = time.perf_counter()
+    response = session.post(f"{base_url}/api/generate", json=payload, timeout=30)
+    if response.status_code != 202:
+        return {'ok': False, 'error': f"HTTP {response.status_code}", 'latency': time.perf_counter() - start}
+    status_url = base_url + response.json()['status_url']
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        info = session.get(status_url, timeout=30).json()
+        if info['status'] in ('completed', 'failed', 'cancelled'):
+            return {
+                'ok': info['status'] == 'completed',
+                'error': info.get('error'),
+                'latency': time.perf_counter() - start,
+                'queue_seconds': info.get('queue_seconds'),
+                'stages': {stage: timing['duration'] for stage, timing in (info.get('timings') or {}).items()},
+            }
+        time.sleep(poll_interval)
+    return {'ok': False, 'error': 'timed out', 'latency': time.perf_counter() - start}
+
+
+def run_load(base_url, args):
+    """Closed-loop load: each of --concurrency clients submits its next request once the last one finished"""
+    for index in range(args.warmup):
+        run_one(base_url, make_request(-1 - index, args.repeat_inputs), args.poll_interval, args.timeout)
+
+    counter = iter(range(args.requests))
+    counter_lock = threading.Lock()
+    samples = []
+
+    def client():
+        while True:
+            with counter_lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            samples.append(run_one(base_url, make_request(index, args.repeat_inputs),
+                                   args.poll_interval, args.timeout))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(client)
+    return samples, time.perf_counter() - start
+
+
+def model_calls():
+    """Routed LLM calls per model and outcome, from the model router's counter"""
+    from model_router import MODEL_CALLS
+    calls = {}
+    for _, labels, value in MODEL_CALLS.samples():
+        calls.setdefault(labels['model'], {})[labels['outcome']] = value
+    return calls
+
+
+def llm_cache_hit_rate():
+    """Share of LLM calls served from the response cache, warmup included"""
+    from pipeline import llm_cache
+    return llm_cache.stats()['hit_rate']
+
+
+def summarize(samples, wall_seconds):
+    ok = [s for s in samples if s['ok']]
+    latencies = [s['latency'] for s in ok] or [0.0]
+    queue_waits = [s['queue_seconds'] for s in ok if s.get('queue_seconds') is not None] or [0.0]
+    stage_names = sorted({stage for s in ok for stage in s['stages']})
+    return {
+        'requests': len(samples),
+        'succeeded': len(ok),
+        'failed': len(samples) - len(ok),
+        'errors': sorted({s['error'] for s in samples if not s['ok']}),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(ok) / wall_seconds, 3) if wall_seconds else 0.0,
+        'latency_p50_s': round(percentile(latencies, 0.50), 3),
+        'latency_p95_s': round(percentile(latencies, 0.95), 3),
+        'latency_p99_s': round(percentile(latencies, 0.99), 3),
+        'latency_max_s': round(max(latencies), 3),
+        'queue_wait_p50_s': round(percentile(queue_waits, 0.50), 3),
+        'stage_p50_s': {stage: round(statistics.median(s['stages'][stage] for s in ok if stage in s['stages']), 3)
+                        for stage in stage_names},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'model_calls': model_calls(),
+        'llm_cache_hit_rate': llm_cache_hit_rate(),
+    }
+
+
+def print_report(config, summary):
+    print(f"\nrequests     {summary['succeeded']} ok, {summary['failed']} failed "
+          f"(concurrency {config['concurrency']}, llm latency {config['llm_latency']}s, "
+          f"github latency {config['github_latency']}s)")
+    print(f"wall time    {summary['wall_seconds']:.2f} s")
+    print(f"throughput   {summary['throughput_rps']:.2f} req/s")
+    print(f"latency      p50 {summary['latency_p50_s']:.3f} s   p95 {summary['latency_p95_s']:.3f} s   "
+          f"p99 {summary['latency_p99_s']:.3f} s   max {summary['latency_max_s']:.3f} s")
+    print(f"queue wait   p50 {summary['queue_wait_p50_s']:.3f} s")
+    print(f"peak RSS     {summary['peak_rss_mb']:.1f} MB")
+    print(f"llm cache    {summary['llm_cache_hit_rate']:.0%} hit rate")
+    if summary['stage_p50_s']:
+        print("stage p50    " + "   ".join(f"{stage} {seconds:.3f} s"
+                                         for stage, seconds in summary['stage_p50_s'].items()))
+    if summary['model_calls']:
+        print("model calls  " + "   ".join(f"{model} {outcomes.get('ok', 0)} ok/{outcomes.get('error', 0)} failed"
+                                         for model, outcomes in sorted(summary['model_calls'].items())))
+    for error in summary['errors']:
+        print(f"❌ {error}")
+
+
+def compare(baseline, config, summary, max_regression):
+    """Print the change against a baseline; return the metrics that regressed too far"""
+    if baseline['config'] != config:
+        differing = sorted(k for k in set(config) | set(baseline['config'])
+                           if config.get(k) != baseline['config'].get(k))
+        print(f"⚠️ Warning: baseline was recorded with different settings: {', '.join(differing)}")
+    print(f"\n{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}")
+    regressions = []
+    for metric, higher_is_better in COMPARED.items():
+        before, after = baseline['summary'].get(metric), summary[metric]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        marker = ''
+        if worse > max_regression:
+            marker = '  ❌'
+            regressions.append(metric)
+        print(f"{metric:<18}{before:>12.3f}{after:>12.3f}{change:>+10.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with a stub LLM and stub GitHub API")
+    parser.add_argument('--requests', type=int, default=20, help="measured interview requests")
+    parser.add_argument('--concurrency', type=int, default=4, help="concurrent clients")
+    parser.add_argument('--warmup', type=int, default=2, help="unmeasured requests sent first")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="stub LLM seconds per call")
+    parser.add_argument('--llm-jitter', type=float, default=0.1, help="relative +/- spread of the LLM latency")
+    parser.add_argument('--llm-token-latency', type=float, default=0.002,
+                        help="extra stub LLM seconds per generated token")
+    parser.add_argument('--github-latency', type=float, default=0.05, help="stub GitHub seconds per request")
+    parser.add_argument('--github-repos', type=int, default=10, help="public repositories of each stub GitHub user")
+    parser.add_argument('--slow-model', action='append', default=[],
+                        help="stub model that answers --slow-factor times slower (repeatable)")
+    parser.add_argument('--slow-factor', type=float, default=10.0, help="latency multiplier of slow models")
+    parser.add_argument('--failing-model', action='append', default=[],
+                        help="stub model whose calls all fail with a 503 (repeatable)")
+    parser.add_argument('--repeat-inputs', action='store_true', help="send identical inputs (exercises caches)")
+    parser.add_argument('--poll-interval', type=float, default=0.02, help="job status polling interval")
+    parser.add_argument('--timeout', type=float, default=300, help="seconds before a request counts as failed")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the stub LLM latency jitter")
+    parser.add_argument('--verbose', action='store_true', help="show pipeline output while running")
+    parser.add_argument('--json', help="also write the report to this file")
+    parser.add_argument('--save-baseline', help="save the report as a baseline to this file")
+    parser.add_argument('--baseline', help="compare against a baseline saved earlier")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="fail when a metric is this much worse than the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    config = {
+        'requests': args.requests, 'concurrency': args.concurrency, 'llm_latency': args.llm_latency,
+        'llm_jitter': args.llm_jitter, 'llm_token_latency': args.llm_token_latency,
+        'github_latency': args.github_latency, 'github_repos': args.github_repos,
+        'repeat_inputs': args.repeat_inputs, 'job_workers': os.getenv('JOB_WORKERS', '2'),
+        'llm_pool_size': os.getenv('LLM_POOL_SIZE', '4'),
+    }
+    if args.slow_model or args.failing_model:
+        config.update(slow_models=sorted(args.slow_model), slow_factor=args.slow_factor,
+                      failing_models=sorted(args.failing_model))
+
+    StubGitHubHandler.latency = args.github_latency
+    StubGitHubHandler.repos = args.github_repos
+    github_server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler)
+    workdir = tempfile.TemporaryDirectory(prefix='bench-e2e-')
+
+    # The app reads these when its singletons are first used
+    os.environ['GITHUB_API_URL'] = serve(github_server)
+    os.environ.pop('GITHUB_TOKEN', None)
+    os.environ['LLM_CACHE_DIR'] = os.path.join(workdir.name, 'llm-cache')
+    os.environ['RESULTS_DB'] = os.path.join(workdir.name, 'results.db')
+    os.environ['QUESTION_BANK_DB'] = os.path.join(workdir.name, 'question_bank.db')
+    os.environ['CHECKPOINT_DB'] = os.path.join(workdir.name, 'checkpoints.db')
+    # Repeated inputs measure the fully cached path, question bank included; unique inputs would never hit it
+    os.environ['QUESTION_BANK_ENABLED'] = '1' if args.repeat_inputs else '0'
+    os.environ.setdefault('JOB_QUEUE_SIZE', str(max(20, args.concurrency * 2)))
+    # Every benchmark client is localhost, so per-client admission limits would throttle the load
+    os.environ.setdefault('CLIENT_RATE_PER_MINUTE', '0')
+    os.environ.setdefault('CLIENT_MAX_ACTIVE_JOBS', '0')
+    # crewai telemetry would otherwise try to reach its collector and stall each task offline
+    os.environ['CREWAI_DISABLE_TELEMETRY'] = 'true'
+    os.environ['OTEL_SDK_DISABLED'] = 'true'
+
+    from werkzeug.serving import make_server
+    import app
+    import pipeline
+    pipeline.llm_router.factory = StubLLM(args.llm_latency, args.llm_jitter, args.seed,
+                                          token_latency=args.llm_token_latency, slow_models=args.slow_model,
+                                          slow_factor=args.slow_factor, failing_models=args.failing_model).factory
+
+    if not args.verbose:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app_server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    base_url = serve(app_server)
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    try:
+        with output:
+            samples, wall_seconds = run_load(base_url, args)
+    finally:
+        app_server.shutdown()
+        github_server.shutdown()
+        workdir.cleanup()
+
+    summary = summarize(samples, wall_seconds)
+    print_report(config, summary)
+    report = {'config': config, 'summary': summary, 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {path}")
+
+    failed = summary['failed'] > 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(json.load(f), config, summary, args.max_regression)
+        for metric in regressions:
+            print(f"❌ {metric} regressed by more than {args.max_regression:.0%}")
+        failed = failed or bool(regressions)
+    if not failed:
+        print("\n✅ Benchmark completed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Measure cold-start import time and time to the first /health response.
+
+Each sample runs in a fresh interpreter so nothing is already imported:
+
+    python benchmarks/startup.py --runs 5 --budget-ms 1500
+
+Exits non-zero if the median time to the first /health response exceeds the
+budget, or if importing the app eagerly loaded crewai or litellm.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+status = None
+if {health}:
+    status = {module}.app.test_client().get('/health').status_code
+t2 = time.perf_counter()
+print(json.dumps({{'import_ms': (t1 - t0) * 1000, 'first_health_ms': (t2 - t0) * 1000,
+                   'health_status': status, 'heavy_loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+HEAVY_MODULES = ('crewai', 'litellm')
+
+
+def probe(module, health):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, health=health, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - start) * 1000
+    return sample
+
+
+def top_imports(module, count):
+    """Slowest imports (cumulative microseconds) according to python -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import and readiness benchmark")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to sample")
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', '1500')),
+                        help="maximum median time from import to first /health response")
+    parser.add_argument('--top', type=int, default=10, help="show the N slowest imports of app")
+    args = parser.parse_args()
+
+    results = {}
+    for module, health in (('pipeline', False), ('app', True)):
+        samples = [probe(module, health) for _ in range(args.runs)]
+        results[module] = {
+            'import_ms': statistics.median(s['import_ms'] for s in samples),
+            'first_health_ms': statistics.median(s['first_health_ms'] for s in samples) if health else None,
+            'process_ms': statistics.median(s['process_ms'] for s in samples),
+            'heavy_loaded': sorted({m for s in samples for m in s['heavy_loaded']}),
+        }
+
+    print(f"{'module':<10}{'import ms':>12}{'first /health ms':>18}{'process ms':>12}  heavy deps loaded")
+    for module, r in results.items():
+        health = f"{r['first_health_ms']:.0f}" if r['first_health_ms'] is not None else '-'
+        print(f"{module:<10}{r['import_ms']:>12.0f}{health:>18}{r['process_ms']:>12.0f}  {', '.join(r['heavy_loaded']) or 'none'}")
+
+    if args.top:
+        print("\nSlowest imports of app (cumulative):")
+        for cumulative_us, name in top_imports('app', args.top):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    for module, r in results.items():
+        if r['heavy_loaded']:
+            failures.append(f"importing {module} eagerly loaded {', '.join(r['heavy_loaded'])}")
+    if results['app']['first_health_ms'] > args.budget_ms:
+        failures.append(f"first /health took {results['app']['first_health_ms']:.0f} ms "
+                        f"(budget {args.budget_ms:.0f} ms)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"\n✅ Within the {args.budget_ms:.0f} ms startup budget")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
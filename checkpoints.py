@@ -0,0 +1,186 @@
+"""Stage checkpoints, so a failed interview run resumes instead of starting over.
+
+Each stage's output (and each answer batch's) is saved under the run's id as
+soon as it is produced. When the same request is retried, its run finds
+those outputs and only the stages that did not finish are executed again. A
+run's checkpoints are deleted once it succeeds.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    output BLOB NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (created_at);
+"""
+
+# Expired and surplus checkpoints are removed at most this often (seconds)
+PRUNE_INTERVAL = 60
+
+CHECKPOINT_RESUMES = metrics.Counter('checkpoint_resumes_total', 'Stage outputs reused from an earlier failed attempt',
+                                     ['stage'])
+
+
+class CheckpointStore:
+    """SQLite store of the stage outputs of unfinished runs.
+
+    Outputs are zlib-compressed and keyed by run id and stage name. They
+    expire ttl seconds after they were written, and only the max_runs most
+    recently written runs are kept, so storage stays bounded however many
+    runs fail and are never retried.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, max_runs=1000, compression_level=6):
+        self.path = path
+        self.ttl = ttl
+        self.max_runs = max_runs
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_prune = 0.0
+        self._counters = {'saved': 0, 'resumed': 0, 'cleared': 0, 'pruned': 0}
+
+    def _connect(self):
+        """Open the database (caller holds the lock)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self, run_id):
+        """{name: output} of a run's unexpired checkpoints"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT name, output FROM checkpoints WHERE run_id = ? AND created_at >= ?",
+                (run_id, time.time() - self.ttl)).fetchall()
+        return {name: zlib.decompress(output).decode('utf-8') for name, output in rows}
+
+    def save(self, run_id, name, output):
+        blob = zlib.compress(output.encode('utf-8'), self.compression_level)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO checkpoints (run_id, name, created_at, output) VALUES (?, ?, ?, ?)",
+                             (run_id, name, time.time(), blob))
+            self._counters['saved'] += 1
+            if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(conn)
+
+    def clear(self, run_id):
+        """Delete a run's checkpoints (it finished)"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deleted = conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,)).rowcount
+            if deleted:
+                self._counters['cleared'] += 1
+
+    def _prune(self, conn):
+        """Drop expired checkpoints and runs beyond max_runs, oldest first (caller holds the lock)"""
+        self._last_prune = time.monotonic()
+        with conn:
+            pruned = conn.execute("DELETE FROM checkpoints WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            pruned += conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN ("
+                " SELECT run_id FROM checkpoints GROUP BY run_id ORDER BY MAX(created_at) DESC LIMIT -1 OFFSET ?)",
+                (self.max_runs,)).rowcount
+        self._counters['pruned'] += pruned
+
+    def run(self, run_id):
+        return RunCheckpoints(self, run_id)
+
+    def record_resume(self, name):
+        with self._lock:
+            self._counters['resumed'] += 1
+        CHECKPOINT_RESUMES.inc(stage=name.split(':', 1)[0])
+
+    def stats(self):
+        with self._lock:
+            runs, rows, size = self._connect().execute(
+                "SELECT COUNT(DISTINCT run_id), COUNT(*), COALESCE(SUM(LENGTH(output)), 0) FROM checkpoints").fetchone()
+            stats = dict(self._counters)
+        stats.update(runs=runs, checkpoints=rows, stored_bytes=size, ttl=self.ttl, max_runs=self.max_runs)
+        return stats
+
+
+class RunCheckpoints:
+    """One run's view of the store: outputs left by earlier attempts, and saving new ones.
+
+    Checkpoint storage is best effort: creating one raises OSError or
+    sqlite3.Error when the store cannot be read, so the caller can run
+    without checkpoints; a later save or clear error is reported and the run
+    carries on as if nothing had been saved.
+    """
+
+    def __init__(self, store, run_id):
+        self.store = store
+        self.run_id = run_id
+        self.resumed = []
+        self._lock = threading.Lock()
+        self._saved = store.load(run_id)
+
+    def get(self, name):
+        """Output saved for name by an earlier attempt, or None"""
+        output = self._saved.get(name)
+        if output is not None:
+            with self._lock:
+                self.resumed.append(name)
+            self.store.record_resume(name)
+        return output
+
+    def save(self, name, output):
+        if not isinstance(output, str) or name in self._saved:
+            return
+        try:
+            self.store.save(self.run_id, name, output)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Warning: could not save checkpoint {name}: {e}")
+
+    def clear(self):
+        try:
+            self.store.clear(self.run_id)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Warning: could not clear checkpoints: {e}")
+
+    def summary(self):
+        """Run id and what was resumed, as reported with the result"""
+        with self._lock:
+            resumed = list(self.resumed)
+        return {
+            'run_id': self.run_id,
+            'resumed_stages': [name for name in resumed if ':' not in name],
+            'resumed_answer_batches': sum(1 for name in resumed if name.startswith('answers:')),
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide checkpoint store, creating it on first use"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CheckpointStore(
+                os.getenv('CHECKPOINT_DB', os.path.join('.cache', 'checkpoints.db')),
+                ttl=int(os.getenv('CHECKPOINT_TTL_SECONDS', str(24 * 3600))),
+                max_runs=int(os.getenv('CHECKPOINT_MAX_RUNS', '1000')),
+            )
+        return _default_store
@@ -0,0 +1,92 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Stage:
+    """A named unit of work that runs once all of its dependencies have finished.
+
+    fn is called with a dict mapping each dependency name to its output.
+    """
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class StageError(Exception):
+    """Raised when a stage fails; carries the stage name and the original error"""
+
+    def __init__(self, stage, error):
+        super().__init__(str(error))
+        self.stage = stage
+        self.error = error
+
+
+def run_dag(stages, progress_callback=None, max_workers=None):
+    """Run stages concurrently, starting each as soon as its dependencies are done.
+
+    Returns (outputs, timings) where outputs maps stage name to its return value
+    and timings maps stage name to {'start', 'end', 'duration'} in seconds
+    relative to the start of the run. Raises StageError for the first failure.
+
+    progress_callback, if given, is called as progress_callback(name, status)
+    when a stage starts ('running') or fails ('failed'), and as
+    progress_callback(name, 'done', output) when it finishes.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages: {missing}")
+
+    def report(name, status, *output):
+        if progress_callback:
+            progress_callback(name, status, *output)
+
+    outputs = {}
+    timings = {}
+    pending = dict(by_name)
+    running = {}
+    run_start = time.perf_counter()
+
+    def execute(stage, inputs):
+        start = time.perf_counter()
+        try:
+            return stage.fn(inputs)
+        finally:
+            end = time.perf_counter()
+            timings[stage.name] = {
+                'start': round(start - run_start, 3),
+                'end': round(end - run_start, 3),
+                'duration': round(end - start, 3),
+            }
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1)
+    try:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in outputs for dep in stage.deps):
+                    del pending[name]
+                    report(name, 'running')
+                    inputs = {dep: outputs[dep] for dep in stage.deps}
+                    # Stages run in a copy of the caller's context (run priority, metrics)
+                    running[executor.submit(contextvars.copy_context().run, execute, stage, inputs)] = name
+
+            if not running:
+                raise ValueError(f"Stages have circular dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    outputs[name] = future.result()
+                except Exception as e:
+                    report(name, 'failed')
+                    raise StageError(name, e) from e
+                report(name, 'done', outputs[name])
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outputs, timings
@@ -0,0 +1,537 @@
+import asyncio
+import contextvars
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+GITHUB_REQUEST_SECONDS = metrics.Histogram('github_request_seconds', 'GitHub API request latency by HTTP status',
+                                           ['status'])
+GITHUB_CACHE_HITS = metrics.Counter('github_cache_hits_total', 'GitHub API responses served from the local cache')
+GITHUB_FETCH_SECONDS = metrics.Histogram('github_fetch_seconds', 'Time to fetch a candidate profile and repositories')
+GITHUB_PARTIAL_FETCHES = metrics.Counter('github_partial_fetches_total',
+                                         'Profile fetches that returned partial data, by reason', ['reason'])
+GITHUB_PREFETCHES = metrics.Counter('github_prefetch_lookups_total',
+                                    'Interview profile lookups in the prefetch cache, by result', ['result'])
+GITHUB_PREFETCH_SAVED = metrics.Histogram('github_prefetch_saved_seconds',
+                                          'GitHub fetch time taken off an interview by a prefetch')
+
+# GitHub usernames: up to 39 letters, digits and hyphens, not starting or ending with a hyphen
+USERNAME_RE = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,37}[A-Za-z0-9])?$')
+PROFILE_HOSTS = ('github.com', 'www.github.com')
+
+REPOS_PER_PAGE = 100
+TOP_REPOSITORIES = 8
+TOP_LANGUAGES = 8
+# Requests kept back from language lookups so other candidates can still be fetched
+RATE_LIMIT_RESERVE = 10
+
+
+class GitHubError(Exception):
+    """Raised when the GitHub API returns an unexpected status"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GitHubRateLimited(GitHubError):
+    """Raised instead of calling GitHub when the rate limit is (nearly) exhausted"""
+
+    def __init__(self, reset_at):
+        wait = max(0, int(reset_at - time.time()))
+        super().__init__(f"GitHub API rate limit nearly exhausted, resets in {wait}s", status_code=403)
+        self.reset_at = reset_at
+
+
+class GitHubClient:
+    """Shared GitHub REST client with a keep-alive connection pool.
+
+    Responses are cached with their ETag: within cache_ttl seconds they are
+    served without touching the network, afterwards they are revalidated with
+    If-None-Match (a 304 costs no payload). Rate-limit headers are tracked and
+    once fewer than min_remaining requests are left the client stops calling
+    GitHub until the reset time, serving stale cache entries where it can.
+
+    fetch_profile() pages through every repository and their language
+    breakdowns concurrently, at most concurrency requests at a time, and
+    returns whatever it has when time_budget seconds run out.
+    """
+
+    def __init__(self, base_url='https://api.github.com', token=None, timeout=10, cache_ttl=300,
+                 pool_size=10, min_remaining=5, max_cache_entries=512, concurrency=8, time_budget=8,
+                 max_repo_pages=5, max_language_repos=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.min_remaining = min_remaining
+        self.max_cache_entries = max_cache_entries
+        self.concurrency = concurrency
+        self.time_budget = time_budget
+        self.max_repo_pages = max_repo_pages
+        self.max_language_repos = max_language_repos
+        pool_size = max(pool_size, concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'crewai-interview-automation',
+        })
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='github')
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.rate_limit = {'limit': None, 'remaining': None, 'reset': None}
+        self._blocked_until = 0
+        self._counters = {'requests': 0, 'cache_hits': 0, 'not_modified': 0, 'stale_served': 0,
+                          'rate_limited': 0, 'errors': 0, 'partial_fetches': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _update_rate_limit(self, response):
+        headers = response.headers
+        with self._lock:
+            for field in ('limit', 'remaining', 'reset'):
+                value = headers.get(f"X-RateLimit-{field.title()}")
+                if value is not None and value.isdigit():
+                    self.rate_limit[field] = int(value)
+            remaining, reset = self.rate_limit['remaining'], self.rate_limit['reset']
+            if remaining is not None and reset is not None and remaining <= self.min_remaining:
+                self._blocked_until = max(self._blocked_until, reset)
+            retry_after = headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                self._blocked_until = max(self._blocked_until, time.time() + int(retry_after))
+
+    def _cached(self, url):
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+            return entry
+
+    def _store(self, url, etag, data):
+        with self._lock:
+            self._cache[url] = {'etag': etag, 'data': data, 'fetched_at': time.time()}
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def _serve_stale_or_raise(self, entry):
+        if entry is not None:
+            self._count('stale_served')
+            return entry['data']
+        self._count('rate_limited')
+        raise GitHubRateLimited(self._blocked_until)
+
+    def get_json(self, path, params=None):
+        """GET an API path and return the decoded JSON body"""
+        url = f"{self.base_url}{path}"
+        if params:
+            url += '?' + urlencode(sorted(params.items()))
+
+        entry = self._cached(url)
+        if entry is not None and time.time() - entry['fetched_at'] < self.cache_ttl:
+            self._count('cache_hits')
+            GITHUB_CACHE_HITS.inc()
+            metrics.count('github_cache_hits')
+            return entry['data']
+
+        if time.time() < self._blocked_until:
+            return self._serve_stale_or_raise(entry)
+
+        headers = {}
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+
+        self._count('requests')
+        metrics.count('github_requests')
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            GITHUB_REQUEST_SECONDS.observe(time.perf_counter() - start, status='error')
+            self._count('errors')
+            if entry is not None:
+                return self._serve_stale_or_raise(entry)
+            raise
+        GITHUB_REQUEST_SECONDS.observe(time.perf_counter() - start, status=response.status_code)
+        self._update_rate_limit(response)
+
+        if response.status_code == 304 and entry is not None:
+            self._count('not_modified')
+            self._store(url, entry['etag'], entry['data'])
+            return entry['data']
+        if response.status_code == 200:
+            data = response.json()
+            self._store(url, response.headers.get('ETag'), data)
+            return data
+        if response.status_code in (403, 429) and time.time() < self._blocked_until:
+            return self._serve_stale_or_raise(entry)
+
+        self._count('errors')
+        raise GitHubError(f"GitHub API returned {response.status_code} for {path}", response.status_code)
+
+    async def _get(self, semaphore, path, params=None):
+        """get_json on the client's thread pool, in a copy of the caller's context (for its run record)"""
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, contextvars.copy_context().run,
+                                              self.get_json, path, params)
+
+    def _language_allowance(self):
+        """How many per-repo language requests the rate limit can spare"""
+        allowance = self.max_language_repos
+        with self._lock:
+            remaining = self.rate_limit['remaining']
+        if remaining is not None:
+            allowance = min(allowance, max(0, remaining - self.min_remaining - RATE_LIMIT_RESERVE))
+        return allowance
+
+    async def _enrich(self, username, found):
+        """Fill found with the user, their repositories and language breakdowns as they arrive"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        repos_path = f"/users/{username}/repos"
+
+        def page_params(page):
+            return {'sort': 'pushed', 'per_page': REPOS_PER_PAGE, 'page': page}
+
+        # The first page does not depend on the profile, so fetch both at once
+        first_page = asyncio.ensure_future(self._get(semaphore, repos_path, page_params(1)))
+        try:
+            found['user'] = await self._get(semaphore, f"/users/{username}")
+        except BaseException:
+            first_page.cancel()
+            raise
+        pages = min(self.max_repo_pages, max(1, math.ceil((found['user'].get('public_repos') or 0) / REPOS_PER_PAGE)))
+        results = await asyncio.gather(first_page, *(self._get(semaphore, repos_path, page_params(page))
+                                                     for page in range(2, pages + 1)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                found['errors'] += 1
+            else:
+                found['repos'].extend(result)
+
+        async def fetch_languages(repo):
+            found['languages'][repo['name']] = await self._get(
+                semaphore, f"/repos/{username}/{repo['name']}/languages")
+
+        # Pages are sorted by last push, so the most active original work gets exact breakdowns
+        originals = [repo for repo in found['repos'] if not repo.get('fork')]
+        results = await asyncio.gather(*(fetch_languages(repo) for repo in originals[:self._language_allowance()]),
+                                       return_exceptions=True)
+        found['errors'] += sum(1 for result in results if isinstance(result, Exception))
+
+    def fetch_profile(self, username):
+        """Fetch a user's profile, repositories and per-repo languages within the time budget.
+
+        Returns a dict with user, repos, languages (repo name -> bytes per
+        language) and partial, which is set when the budget ran out or some
+        requests failed. Raises if the profile itself could not be fetched.
+        """
+        found = {'user': None, 'repos': [], 'languages': {}, 'errors': 0}
+        reason = None
+        try:
+            asyncio.run(asyncio.wait_for(self._enrich(username, found), self.time_budget))
+        except asyncio.TimeoutError:
+            if found['user'] is None:
+                raise GitHubError(f"Timed out fetching GitHub user {username} after {self.time_budget}s")
+            reason = 'time_budget'
+        if reason is None and found['errors']:
+            reason = 'errors'
+        if reason is not None:
+            self._count('partial_fetches')
+            GITHUB_PARTIAL_FETCHES.inc(reason=reason)
+            metrics.count('github_partial_fetches')
+        found['partial'] = reason is not None
+        return found
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['cache_entries'] = len(self._cache)
+            stats['rate_limit'] = dict(self.rate_limit)
+        return stats
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide GitHub client, creating it on first use"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GitHubClient(
+                base_url=os.getenv('GITHUB_API_URL', 'https://api.github.com'),
+                token=os.getenv('GITHUB_TOKEN'),
+                timeout=float(os.getenv('GITHUB_TIMEOUT', '10')),
+                cache_ttl=int(os.getenv('GITHUB_CACHE_TTL', '300')),
+                concurrency=int(os.getenv('GITHUB_CONCURRENCY', '8')),
+                time_budget=float(os.getenv('GITHUB_TIME_BUDGET', '8')),
+                max_repo_pages=int(os.getenv('GITHUB_MAX_REPO_PAGES', '5')),
+                max_language_repos=int(os.getenv('GITHUB_LANGUAGE_REPOS', '30')),
+            )
+        return _default_client
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def summarize_profile(user, repos, languages, partial=False, now=None):
+    """Aggregate a profile and its repositories into the compact summary used in prompts.
+
+    Language shares are weighted by bytes of code: exact per-repo breakdowns
+    where they were fetched, otherwise the repo's main language weighted by
+    its size. Forks are counted but left out of languages, stars and the top
+    repositories, which are ranked by stars decayed by time since last push.
+    """
+    now = now or datetime.now(timezone.utc)
+    originals = [repo for repo in repos if not repo.get('fork')]
+
+    language_bytes = {}
+    for repo in originals:
+        breakdown = languages.get(repo.get('name'))
+        if breakdown is None and repo.get('language'):
+            breakdown = {repo['language']: (repo.get('size') or 1) * 1024}
+        for language, size in (breakdown or {}).items():
+            language_bytes[language] = language_bytes.get(language, 0) + size
+    total_bytes = sum(language_bytes.values())
+    # Languages under 1% of the code are build files and scripts, not skills
+    top_languages = [{'language': language, 'share': round(size / total_bytes, 3)}
+                     for language, size in sorted(language_bytes.items(), key=lambda item: -item[1])
+                     if size / total_bytes >= 0.01][:TOP_LANGUAGES]
+
+    pushed_days = {}
+    for repo in originals:
+        pushed = _parse_time(repo.get('pushed_at') or repo.get('updated_at'))
+        pushed_days[repo.get('name')] = (now - pushed).days if pushed else None
+    recent = [days for days in pushed_days.values() if days is not None]
+
+    def score(repo):
+        days = pushed_days.get(repo.get('name'))
+        return (repo.get('stargazers_count', 0) + 1) * 0.5 ** ((days if days is not None else 3650) / 365)
+
+    top_repositories = [{
+        'name': repo.get('name', ''),
+        'description': repo.get('description') or 'No description',
+        'language': repo.get('language') or 'Not specified',
+        'stars': repo.get('stargazers_count', 0),
+        'forks': repo.get('forks_count', 0),
+        'pushed_at': repo.get('pushed_at') or repo.get('updated_at', ''),
+        'topics': repo.get('topics', []),
+    } for repo in sorted(originals, key=score, reverse=True)[:TOP_REPOSITORIES]]
+
+    return {
+        'name': user.get('name', 'Not provided'),
+        'bio': user.get('bio', 'No bio available'),
+        'public_repos': user.get('public_repos', 0),
+        'followers': user.get('followers', 0),
+        'following': user.get('following', 0),
+        'company': user.get('company', 'Not specified'),
+        'location': user.get('location', 'Not specified'),
+        'blog': user.get('blog', 'No blog'),
+        'created_at': user.get('created_at', ''),
+        'updated_at': user.get('updated_at', ''),
+        'repos_analyzed': len(repos),
+        'forks_skipped': len(repos) - len(originals),
+        'languages_measured': sum(1 for repo in originals if repo.get('name') in languages),
+        'total_stars': sum(repo.get('stargazers_count', 0) for repo in originals),
+        'total_forks': sum(repo.get('forks_count', 0) for repo in originals),
+        'languages': top_languages,
+        'activity': {
+            'pushed_30d': sum(1 for days in recent if days <= 30),
+            'pushed_90d': sum(1 for days in recent if days <= 90),
+            'pushed_365d': sum(1 for days in recent if days <= 365),
+            'last_pushed_days_ago': min(recent) if recent else None,
+        },
+        'top_repositories': top_repositories,
+        'partial': partial,
+    }
+
+
+def parse_username(github_url):
+    """GitHub username from a profile URL (or a bare username)"""
+    return github_url.strip().rstrip('/').split('/')[-1]
+
+
+def profile_username(github_url):
+    """Username of a GitHub profile URL like https://github.com/name, or None for any other URL
+
+    Repository and deeper URLs are rejected rather than read as a profile.
+    """
+    parts = urlsplit(github_url.strip())
+    username = parts.path[1:].rstrip('/')
+    if (parts.scheme not in ('http', 'https') or (parts.hostname or '').lower() not in PROFILE_HOSTS
+            or not USERNAME_RE.match(username)):
+        return None
+    return username
+
+
+def _fetch_summary(username, client=None):
+    with metrics.span('github_fetch', GITHUB_FETCH_SECONDS):
+        found = (client or get_client()).fetch_profile(username)
+    return summarize_profile(found['user'], found['repos'], found['languages'], partial=found['partial'])
+
+
+def fetch_github_data(github_url, client=None):
+    """Fetch real data from GitHub profile
+
+    With the default client, a summary prefetched while the form was being
+    filled in is used when there is one.
+    """
+    try:
+        # Extract username from GitHub URL
+        username = parse_username(github_url)
+
+        if client is None:
+            summary = get_prefetcher().take(username)
+            if summary is not None:
+                return summary
+
+        return _fetch_summary(username, client)
+
+    except GitHubError as e:
+        return {'error': f"Failed to fetch GitHub data: {str(e)}"}
+    except Exception as e:
+        return {'error': f"Error fetching GitHub data: {str(e)}"}
+
+
+class ProfilePrefetcher:
+    """Short-lived cache of profile summaries fetched ahead of the interview request.
+
+    prefetch(username) starts fetching a summary on a background worker, and
+    take(username) returns it when the interview needs it: straight from the
+    cache if the fetch has finished, or by waiting for the rest of a fetch
+    that is still in flight. Summaries are kept for ttl seconds, so a profile
+    typed into the form but never submitted costs nothing after that; failed
+    fetches are not kept. Entries are keyed by lower-cased username, as
+    GitHub usernames are case-insensitive.
+    """
+
+    def __init__(self, fetch=_fetch_summary, ttl=120, max_entries=256, workers=2):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='github-prefetch')
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'prefetches': 0, 'already_cached': 0, 'hits': 0, 'pending_hits': 0, 'misses': 0,
+                          'expired': 0, 'failed': 0, 'saved_seconds': 0.0}
+
+    def _run(self, entry, username):
+        try:
+            summary = self.fetch(username)
+        except Exception as e:
+            summary = {'error': str(e)}
+        with self._lock:
+            entry['fetch_seconds'] = time.monotonic() - entry['started']
+            entry['expires'] = time.monotonic() + self.ttl
+            if 'error' in summary:
+                self._counters['failed'] += 1
+                if self._entries.get(username) is entry:
+                    del self._entries[username]
+        return summary
+
+    def _current(self, key):
+        """Unexpired entry for key, or None, and whether an expired one was dropped (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is not None and entry['expires'] is not None and entry['expires'] < time.monotonic():
+            del self._entries[key]
+            self._counters['expired'] += 1
+            return None, True
+        return entry, False
+
+    def prefetch(self, username):
+        """Start fetching username's summary unless it is cached or on its way; returns 'started' or 'cached'"""
+        key = username.lower()
+        with self._lock:
+            if self._current(key)[0] is not None:
+                self._counters['already_cached'] += 1
+                return 'cached'
+            entry = {'started': time.monotonic(), 'expires': None, 'fetch_seconds': None}
+            entry['future'] = self._executor.submit(self._run, entry, key)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._counters['prefetches'] += 1
+        return 'started'
+
+    def take(self, username):
+        """Prefetched summary for username, waiting for an unfinished fetch, or None if there is none"""
+        with self._lock:
+            entry, expired = self._current(username.lower())
+        if entry is None:
+            return self._miss('expired' if expired else 'miss')
+        future = entry['future']
+        result = 'hit' if future.done() else 'pending_hit'
+        waited = time.monotonic()
+        summary = future.result()
+        waited = time.monotonic() - waited
+        if 'error' in summary:
+            return self._miss('miss')
+        # A finished fetch saves its whole duration; joining one in flight saves the part already done
+        saved = max(0.0, entry['fetch_seconds'] - waited)
+        with self._lock:
+            self._counters[result + 's'] += 1
+            self._counters['saved_seconds'] += saved
+        GITHUB_PREFETCHES.inc(result=result)
+        GITHUB_PREFETCH_SAVED.observe(saved)
+        metrics.count('github_prefetch_hits')
+        return summary
+
+    def _miss(self, result):
+        with self._lock:
+            self._counters['misses'] += 1
+        GITHUB_PREFETCHES.inc(result=result)
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['pending_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['pending_hits']) / lookups, 3) if lookups else None
+        stats['saved_seconds'] = round(stats['saved_seconds'], 3)
+        stats['ttl'] = self.ttl
+        return stats
+
+
+_default_prefetcher = None
+_default_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Return the process-wide profile prefetcher, creating it on first use"""
+    global _default_prefetcher
+    with _default_prefetcher_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = ProfilePrefetcher(
+                ttl=int(os.getenv('GITHUB_PREFETCH_TTL', '120')),
+                max_entries=int(os.getenv('GITHUB_PREFETCH_MAX_ENTRIES', '256')),
+                workers=int(os.getenv('GITHUB_PREFETCH_WORKERS', '2')),
+            )
+        return _default_prefetcher
@@ -0,0 +1,378 @@
+import asyncio
+import atexit
+import itertools
+import math
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import admission
+import metrics
+
+JOB_WAIT_SECONDS = metrics.Histogram('job_queue_wait_seconds', 'Time jobs spend queued before a worker starts them')
+JOB_RUN_SECONDS = metrics.Histogram('job_run_seconds', 'Time from a worker starting a job to its end, by status',
+                                    ['status'])
+JOB_COALESCED = metrics.Counter('job_coalesced_total', 'Submissions attached to an identical job already in flight')
+
+
+# Retry-After suggested before any job has finished to measure how long they take
+DEFAULT_RETRY_AFTER = 30
+
+
+class QueueFullError(admission.AdmissionError):
+    """Raised when the job queue cannot accept more work"""
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Job:
+    """A single queued interview generation run and its progress"""
+
+    def __init__(self, fn, kwargs, stages=None, key=None, priority=admission.DEFAULT_PRIORITY, client=None,
+                 on_cancel=None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.kwargs = kwargs
+        self.on_cancel = on_cancel
+        self.key = key
+        self.priority = priority
+        self.client = client
+        self.coalesced = 0
+        self.status = 'queued'
+        self.stages = {name: {'status': 'pending', 'started_at': None, 'finished_at': None}
+                       for name in (stages or [])}
+        self.result = None
+        self.error = None
+        self.created_at = _now()
+        self.created_monotonic = time.monotonic()
+        self.started_monotonic = None
+        self.started_at = None
+        self.finished_at = None
+        self.finished_monotonic = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._done = threading.Event()
+        self._async_waiters = []
+
+    def _add_event(self, event):
+        """Append to the event log and wake any streaming readers (caller holds the lock)"""
+        event['id'] = len(self.events)
+        self.events.append(event)
+        self._changed.notify_all()
+        for loop, future in self._async_waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self._async_waiters.clear()
+
+    def record_progress(self, stage, status, output=None):
+        """Progress callback handed to the pipeline: record a stage transition.
+
+        Besides 'running', 'done' and 'failed', a stage may report 'partial'
+        outputs (e.g. individual Q&A pairs) before it is done; those are only
+        added to the event log.
+        """
+        with self._lock:
+            if status != 'partial':
+                info = self.stages.setdefault(stage, {'status': 'pending', 'started_at': None, 'finished_at': None})
+                info['status'] = status
+                if status == 'running':
+                    info['started_at'] = _now()
+                else:
+                    info['finished_at'] = _now()
+            event = {'type': 'stage', 'stage': stage, 'status': status}
+            if output is not None:
+                event['output'] = output
+            self._add_event(event)
+
+    def events_since(self, cursor, timeout=None):
+        """Return events with id >= cursor, waiting up to timeout for new ones.
+
+        Returns an empty list on timeout; once the job has finished and all
+        events have been read it returns immediately.
+        """
+        with self._lock:
+            if len(self.events) <= cursor and not self._done.is_set():
+                self._changed.wait(timeout)
+            return self.events[cursor:]
+
+    async def events_since_async(self, cursor, timeout=None):
+        """events_since() for coroutines: waits on the event loop instead of blocking a thread"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if len(self.events) > cursor or self._done.is_set():
+                return self.events[cursor:]
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+        with self._lock:
+            return self.events[cursor:]
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = _now()
+            self.finished_monotonic = time.monotonic()
+            self._done.set()
+            self._add_event({'type': 'finished', 'status': status, 'error': error})
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns True if it did"""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def to_dict(self):
+        with self._lock:
+            stages = {name: dict(info) for name, info in self.stages.items()}
+            completed = sum(1 for info in stages.values() if info['status'] == 'done')
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'priority': self.priority,
+                'stages': stages,
+                'progress': {'completed': completed, 'total': len(stages)},
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'queue_seconds': (round(self.started_monotonic - self.created_monotonic, 3)
+                                  if self.started_monotonic is not None else None),
+                'coalesced_requests': self.coalesced,
+            }
+
+
+class JobQueue:
+    """Bounded priority queue of jobs executed by a pool of background worker threads.
+
+    Workers are started lazily on the first submit, so importing the app
+    (or the reloader parent process) does not spawn threads. Queued jobs
+    start in priority order ('interactive' before 'api'), and their LLM
+    calls are made at that priority. Submissions with the same key as a
+    queued or running job attach to that job instead of starting another
+    (single-flight).
+
+    Work that cannot finish in reasonable time is refused up front rather
+    than accepted: when the queue is full, when the estimated wait exceeds
+    max_wait seconds, or when a client already has max_active_per_client
+    jobs queued or running.
+    """
+
+    def __init__(self, workers=2, max_queue=20, job_ttl=3600, max_wait=0, max_active_per_client=0):
+        self.workers = max(1, workers)
+        self.job_ttl = job_ttl
+        self.max_wait = max_wait
+        self.max_active_per_client = max_active_per_client
+        self._queue = queue.PriorityQueue(maxsize=max(1, max_queue))
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._in_flight = {}
+        self._active_by_client = {}
+        self._coalesced = 0
+        self._avg_run_seconds = None
+        self._lock = threading.Lock()
+        self._threads = []
+        self._accepting = True
+
+    def _start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _estimate_wait(self, rank):
+        """Seconds a new job of this priority rank would likely wait, or None before any job finished
+        (caller holds the lock)"""
+        if self._avg_run_seconds is None:
+            return None
+        ahead = running = 0
+        for job in self._jobs.values():
+            if job.status == 'running':
+                running += 1
+            elif job.status == 'queued' and admission.PRIORITIES[job.priority] <= rank:
+                ahead += 1
+        return (ahead + running) // self.workers * self._avg_run_seconds
+
+    def _retry_after(self, wait):
+        if wait is None:
+            return DEFAULT_RETRY_AFTER
+        return max(1, math.ceil(min(wait, self._avg_run_seconds or wait)))
+
+    def submit(self, fn, stages=None, key=None, priority=admission.DEFAULT_PRIORITY, client=None, on_cancel=None,
+               **kwargs):
+        """Queue fn(**kwargs, progress_callback=...) and return the new Job.
+
+        With a key, a queued or running job submitted with the same key is
+        returned instead and nothing new is queued. Raises QueueFullError,
+        with a suggested retry_after, when the job is refused. on_cancel() is
+        called if the job is cancelled before it starts, to release what was
+        set aside for it.
+        """
+        rank = admission.PRIORITIES[priority]
+        job = Job(fn, kwargs, stages, key, priority, client, on_cancel)
+        with self._lock:
+            if not self._accepting:
+                raise QueueFullError("Job queue is shutting down")
+            existing = self._in_flight.get(key) if key is not None else None
+            if existing is not None:
+                with existing._lock:
+                    existing.coalesced += 1
+                self._coalesced += 1
+                JOB_COALESCED.inc()
+                return existing
+            self._prune()
+            wait = self._estimate_wait(rank)
+            if (self.max_active_per_client and client is not None
+                    and self._active_by_client.get(client, 0) >= self.max_active_per_client):
+                raise QueueFullError(f"At most {self.max_active_per_client} interviews per client can be "
+                                     "queued or running", self._retry_after(wait), reason='client_active')
+            if self.max_wait and wait is not None and wait > self.max_wait:
+                raise QueueFullError(f"Server is saturated (estimated wait {wait:.0f}s), please try again later",
+                                     self._retry_after(wait - self.max_wait), reason='max_wait')
+            self._start()
+            try:
+                self._queue.put_nowait((rank, next(self._sequence), job))
+            except queue.Full:
+                raise QueueFullError("Job queue is full, please try again later", self._retry_after(wait),
+                                     reason='queue_full')
+            self._jobs[job.id] = job
+            if key is not None:
+                self._in_flight[key] = job
+            if client is not None:
+                self._active_by_client[client] = self._active_by_client.get(client, 0) + 1
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            coalesced = self._coalesced
+            avg_run_seconds = self._avg_run_seconds
+            estimated_wait = self._estimate_wait(admission.PRIORITIES[admission.DEFAULT_PRIORITY])
+        return {
+            'workers': self.workers,
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'queue_capacity': self._queue.maxsize,
+            'coalesced': coalesced,
+            'avg_run_seconds': round(avg_run_seconds, 3) if avg_run_seconds is not None else None,
+            'estimated_wait_seconds': round(estimated_wait, 3) if estimated_wait is not None else None,
+        }
+
+    def _prune(self):
+        """Forget finished jobs older than job_ttl (caller holds the lock)"""
+        cutoff = time.monotonic() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_monotonic is not None and job.finished_monotonic < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _release(self, job):
+        """Stop attaching new submissions to a finished job and free its client's slot"""
+        with self._lock:
+            if job.key is not None and self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            if job.client is not None:
+                remaining = self._active_by_client.get(job.client, 0) - 1
+                if remaining > 0:
+                    self._active_by_client[job.client] = remaining
+                else:
+                    self._active_by_client.pop(job.client, None)
+
+    def _run(self, job):
+        if not self._accepting:
+            self._release(job)
+            if job.on_cancel is not None:
+                try:
+                    job.on_cancel()
+                except Exception as e:
+                    print(f"⚠️ Warning: cleanup of cancelled job {job.id} failed: {e}")
+            job._finish('cancelled', error="Server shut down before the job started")
+            return
+        with job._lock:
+            job.status = 'running'
+            job.started_at = _now()
+            job.started_monotonic = time.monotonic()
+        JOB_WAIT_SECONDS.observe(job.started_monotonic - job.created_monotonic)
+        try:
+            with admission.priority(job.priority):
+                result = job.fn(progress_callback=job.record_progress, **job.kwargs)
+        except Exception as e:
+            job._finish('failed', error=str(e))
+        else:
+            if isinstance(result, dict) and not result.get('success', True):
+                job._finish('failed', result=result, error=result.get('error'))
+            else:
+                job._finish('completed', result=result)
+        finally:
+            self._release(job)
+        elapsed = time.monotonic() - job.started_monotonic
+        JOB_RUN_SECONDS.observe(elapsed, status=job.status)
+        with self._lock:
+            # Exponentially weighted, so the wait estimate follows current LLM latency
+            self._avg_run_seconds = elapsed if self._avg_run_seconds is None else (
+                0.8 * self._avg_run_seconds + 0.2 * elapsed)
+
+    def shutdown(self, timeout=None):
+        """Stop accepting jobs, cancel queued ones and wait for in-flight jobs to finish"""
+        with self._lock:
+            if not self._accepting:
+                return
+            self._accepting = False
+            threads = list(self._threads)
+        for _ in threads:
+            # Sorts after every queued job, which the workers then cancel
+            self._queue.put((math.inf, next(self._sequence), None))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in threads:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            thread.join(remaining)
+
+    def install_shutdown_hook(self, timeout=None):
+        """Drain in-flight jobs when the interpreter exits
+
+        Registered with threading's exit hooks, which run before
+        concurrent.futures stops accepting work, so running jobs can still
+        submit stages and answer batches while they are drained. Plain atexit
+        handlers run too late for that.
+        """
+        register = getattr(threading, '_register_atexit', None)
+        if register is None:
+            atexit.register(self.shutdown, timeout)
+        else:
+            register(self.shutdown, timeout)
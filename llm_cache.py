@@ -0,0 +1,186 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from llm_pool import set_call
+
+LLM_CACHE_LOOKUPS = metrics.Counter('llm_cache_lookups_total', 'LLM response cache lookups by result', ['result'])
+
+
+class LLMCache:
+    """Content-addressed cache of LLM responses.
+
+    Responses are keyed on a hash of the model name and the full message list
+    (which carries both the task prompt and the upstream context). Lookups go
+    through an in-memory LRU tier first, then an on-disk tier that survives
+    restarts. Both tiers expire entries after ttl seconds; the memory tier holds
+    at most max_entries responses and the disk tier at most max_disk_bytes.
+    """
+
+    def __init__(self, directory, max_entries=256, max_disk_bytes=100 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._disk_index = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'bypassed': 0,
+                          'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(model, messages):
+        payload = json.dumps({'model': model, 'messages': messages}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        """Scan the cache directory once to learn entry ages and sizes (caller holds the lock)"""
+        if self._disk_index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        entries.sort()
+        self._disk_index = OrderedDict((key, (mtime, size)) for mtime, key, size in entries)
+        self._disk_bytes = sum(size for _, size in self._disk_index.values())
+
+    def _remove_disk(self, key):
+        mtime, size = self._disk_index.pop(key, (None, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+            self._load_disk_index()
+            if key in self._disk_index:
+                try:
+                    with open(self._path(key), encoding='utf-8') as f:
+                        record = json.load(f)
+                except (OSError, ValueError):
+                    record = None
+                if record is not None and now - record['created'] < self.ttl:
+                    self._remember(key, record['created'], record['response'])
+                    self._counters['disk_hits'] += 1
+                    return record['response']
+                self._remove_disk(key)
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, value, model=None):
+        created = time.time()
+        record = json.dumps({'created': created, 'model': model, 'response': value})
+        with self._lock:
+            self._remember(key, created, value)
+            self._counters['stores'] += 1
+
+            self._load_disk_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(record)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Warning: could not write LLM cache entry: {e}")
+                return
+            if key in self._disk_index:
+                self._disk_bytes -= self._disk_index.pop(key)[1]
+            size = len(record.encode('utf-8'))
+            self._disk_index[key] = (created, size)
+            self._disk_bytes += size
+
+            # Entries are ordered oldest first: drop expired ones, then trim to the size budget
+            while self._disk_index:
+                oldest = next(iter(self._disk_index))
+                if created - self._disk_index[oldest][0] < self.ttl and self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._remove_disk(oldest)
+                self._counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = len(self._disk_index) if self._disk_index is not None else None
+            stats['disk_bytes'] = self._disk_bytes if self._disk_index is not None else None
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def wrap(self, llm, bypass=False):
+        """Return a copy of llm whose call() is served from this cache.
+
+        With bypass=True the cache is not consulted, but the fresh response is
+        still stored so later requests can reuse it. The original llm object is
+        left untouched, so a shared client can be wrapped per request.
+        """
+        cache = self
+        inner_call = llm.call
+        model = getattr(llm, 'model', None)
+
+        def call(messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+            # Tool and structured-output calls depend on more than the prompt; never cache them
+            if tools or available_functions or kwargs.get('response_model') is not None:
+                return inner_call(messages, tools=tools, callbacks=callbacks,
+                                  available_functions=available_functions, **kwargs)
+
+            key = cache.make_key(model, messages)
+            if bypass:
+                with cache._lock:
+                    cache._counters['bypassed'] += 1
+                LLM_CACHE_LOOKUPS.inc(result='bypass')
+            else:
+                cached = cache.get(key)
+                if cached is not None:
+                    LLM_CACHE_LOOKUPS.inc(result='hit')
+                    metrics.count('llm_cache_hits')
+                    return cached
+                LLM_CACHE_LOOKUPS.inc(result='miss')
+                metrics.count('llm_cache_misses')
+
+            response = inner_call(messages, tools=tools, callbacks=callbacks,
+                                  available_functions=available_functions, **kwargs)
+            if isinstance(response, str) and response:
+                cache.set(key, response, model=model)
+            return response
+
+        return set_call(copy.copy(llm), call)
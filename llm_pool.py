@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import metrics
+
+# HTTP statuses and error fragments that indicate a retryable provider hiccup
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_MARKERS = ('429', '503', 'rate limit', 'ratelimit', 'resource_exhausted', 'overloaded',
+                     'unavailable', 'timed out', 'timeout', 'try again')
+RATE_LIMIT_MARKERS = ('429', 'rate limit', 'ratelimit', 'resource_exhausted', 'quota')
+
+
+LLM_CALL_SECONDS = metrics.Histogram('llm_call_seconds', 'Latency of each LLM call attempt', ['outcome'])
+LLM_RETRIES = metrics.Counter('llm_retries_total', 'LLM call attempts retried after a transient error', ['error'])
+LLM_FAILURES = metrics.Counter('llm_failures_total', 'LLM calls that failed after retries', ['error'])
+LLM_CLIENT_CREATE_SECONDS = metrics.Histogram('llm_client_create_seconds', 'Time to construct an LLM client')
+
+
+def set_call(client, call):
+    """Replace client.call with call; LLM objects may be pydantic models, so attribute validation is bypassed"""
+    object.__setattr__(client, 'call', call)
+    return client
+
+
+class LLMUnavailable(Exception):
+    """Raised when no healthy LLM client can be created or borrowed"""
+
+
+def is_transient(error):
+    """True for errors worth retrying: rate limits, overload and timeouts"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int) and status in TRANSIENT_STATUSES:
+        return True
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in TRANSIENT_MARKERS)
+
+
+def is_rate_limited(error):
+    """True for provider rate-limit errors, which should slow every caller down"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if status == 429:
+        return True
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class LLMPool:
+    """Process-wide pool of pre-initialized LLM clients that interview runs borrow.
+
+    Clients are built by factory() and checked with health_check(client) before
+    they enter the pool. Every client's call() is instrumented once: transient
+    errors (429/503, timeouts) are retried per call with exponential backoff and
+    full jitter, and call latency, retries and failures are recorded for stats().
+    A client that keeps failing is replaced on its next return to the pool.
+    With a limiter (admission.LLMLimiter) every attempt first takes one of its
+    slots, and a provider rate-limit error pauses all callers for the backoff.
+    With health (model_router.ModelHealth) every attempt's latency and outcome
+    is recorded there too.
+    """
+
+    def __init__(self, factory, size=4, max_retries=3, base_delay=1.0, max_delay=30.0,
+                 health_check=None, max_consecutive_failures=5, borrow_timeout=60, limiter=None,
+                 health=None):
+        self.factory = factory
+        self.limiter = limiter
+        self.health = health
+        self.size = max(1, size)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.health_check = health_check
+        self.max_consecutive_failures = max_consecutive_failures
+        self.borrow_timeout = borrow_timeout
+
+        self._idle = []
+        self._created = 0
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'calls': 0, 'retries': 0, 'failures': 0, 'clients_created': 0,
+                          'clients_discarded': 0, 'borrow_waits': 0}
+        self._errors = {}
+
+    def _create(self):
+        """Build, health-check and instrument a new client (called without the lock)"""
+        try:
+            with metrics.span('llm_client_create', LLM_CLIENT_CREATE_SECONDS):
+                client = self.factory()
+            if self.health_check and not self.health_check(client):
+                raise LLMUnavailable("LLM client failed its health check")
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            raise LLMUnavailable(f"Could not create LLM client: {e}") from e
+        self._instrument(client)
+        with self._lock:
+            self._counters['clients_created'] += 1
+        return client
+
+    def warm(self):
+        """Create clients until the pool is full, so the first runs find them ready"""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                client = self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._idle.append(client)
+                self._available.notify()
+
+    @contextmanager
+    def borrow(self):
+        """Check a client out of the pool for the duration of a with-block"""
+        client = None
+        deadline = time.monotonic() + self.borrow_timeout
+        with self._lock:
+            while not self._idle and self._created >= self.size:
+                self._counters['borrow_waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._available.wait(remaining):
+                    raise LLMUnavailable("Timed out waiting for a free LLM client")
+            if self._idle:
+                client = self._idle.pop()
+            else:
+                self._created += 1
+        if client is None:
+            try:
+                client = self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                    self._available.notify()
+                raise
+        try:
+            yield client
+        finally:
+            self._give_back(client)
+
+    def _give_back(self, client):
+        with self._lock:
+            if self._failures.get(id(client), 0) >= self.max_consecutive_failures:
+                # Drop a client that keeps failing; the next borrow creates a fresh one
+                self._failures.pop(id(client), None)
+                self._created -= 1
+                self._counters['clients_discarded'] += 1
+            else:
+                self._idle.append(client)
+            self._available.notify()
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff: uniform(0, min(max_delay, base * 2**attempt))"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _record_success(self, client, latency):
+        with self._lock:
+            self._counters['calls'] += 1
+            self._latencies.append(latency)
+            self._failures[id(client)] = 0
+
+    def _record_error(self, client, error, retrying):
+        with self._lock:
+            name = type(error).__name__
+            self._errors[name] = self._errors.get(name, 0) + 1
+            if retrying:
+                self._counters['retries'] += 1
+            else:
+                self._counters['failures'] += 1
+                self._failures[id(client)] = self._failures.get(id(client), 0) + 1
+
+    def _instrument(self, client):
+        pool = self
+        inner_call = client.call
+
+        def call(*args, **kwargs):
+            attempt = 0
+            while True:
+                # The slot is held for the call only, never across a backoff sleep
+                with pool.limiter.slot() if pool.limiter is not None else nullcontext():
+                    start = time.perf_counter()
+                    try:
+                        response = inner_call(*args, **kwargs)
+                        error = None
+                    except Exception as e:
+                        error = e
+                    elapsed = time.perf_counter() - start
+                if pool.health is not None:
+                    pool.health.record(elapsed, error is None)
+                if error is None:
+                    pool._record_success(client, elapsed)
+                    LLM_CALL_SECONDS.observe(elapsed, outcome='ok')
+                    metrics.add_span('llm_call', elapsed)
+                    return response
+
+                LLM_CALL_SECONDS.observe(elapsed, outcome='error')
+                metrics.add_span('llm_call', elapsed)
+                metrics.count('llm_errors')
+                if attempt < pool.max_retries and is_transient(error):
+                    pool._record_error(client, error, retrying=True)
+                    LLM_RETRIES.inc(error=type(error).__name__)
+                    metrics.count('llm_retries')
+                    delay = pool.backoff_delay(attempt)
+                    if pool.limiter is not None and is_rate_limited(error):
+                        # Back everyone off, not just this call, or the next burst hits the same limit
+                        pool.limiter.pause(delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                pool._record_error(client, error, retrying=False)
+                LLM_FAILURES.inc(error=type(error).__name__)
+                raise error
+
+        set_call(client, call)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['errors'] = dict(self._errors)
+            stats['size'] = self.size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._created - len(self._idle)
+            latencies = sorted(self._latencies)
+        if self.limiter is not None:
+            stats['limiter'] = self.limiter.stats()
+        if latencies:
+            stats['latency_seconds'] = {
+                'avg': round(sum(latencies) / len(latencies), 3),
+                'p50': round(latencies[len(latencies) // 2], 3),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                'max': round(latencies[-1], 3),
+            }
+        else:
+            stats['latency_seconds'] = None
+        return stats
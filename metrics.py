@@ -0,0 +1,239 @@
+"""In-process metrics exported in the Prometheus text format.
+
+Modules declare their metrics at import time:
+
+    GITHUB_SECONDS = metrics.Histogram('github_request_seconds', 'GitHub API request latency', ['outcome'])
+    GITHUB_SECONDS.observe(0.2, outcome='ok')
+
+and GET /metrics renders every registered metric with REGISTRY.render().
+
+A run can also collect its own timing record: bind a RunRecord with
+bind_run() in the thread doing the work and span()/count() calls made
+anywhere below it (GitHub client, LLM pool, cache) are added to it.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name!r} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, self._labels(key), value) for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; with fn it is read from fn() at render time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY, fn=None):
+        super().__init__(name, help, labelnames, registry)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.fn is not None:
+            return [(self.name, {}, self.fn())]
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, self._labels(key), value) for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (usually seconds) over fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: {'counts': list(state['counts']), 'sum': state['sum'], 'count': state['count']}
+                      for key, state in self._values.items()}
+        samples = []
+        for key, state in sorted(values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f"{self.name}_sum", labels, state['sum']))
+            samples.append((f"{self.name}_count", labels, state['count']))
+        return samples
+
+
+class RunRecord:
+    """Timing spans and counts collected for one interview run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts = {}
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            span = self.spans.setdefault(name, {'count': 0, 'seconds': 0.0})
+            span['count'] += 1
+            span['seconds'] += seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'total_seconds': round(time.perf_counter() - self.started, 3),
+                'spans': {name: {'count': span['count'], 'seconds': round(span['seconds'], 3)}
+                          for name, span in self.spans.items()},
+                'counts': dict(self.counts),
+            }
+
+
+_current_run = contextvars.ContextVar('current_run', default=None)
+
+
+@contextmanager
+def bind_run(record):
+    """Attribute span() and count() calls in this thread to record"""
+    token = _current_run.set(record)
+    try:
+        yield record
+    finally:
+        _current_run.reset(token)
+
+
+def count(name, amount=1):
+    """Add to a count on the current run's record, if one is bound"""
+    record = _current_run.get()
+    if record is not None:
+        record.count(name, amount)
+
+
+def add_span(name, seconds):
+    """Add an already measured span to the current run's record, if one is bound"""
+    record = _current_run.get()
+    if record is not None:
+        record.add_span(name, seconds)
+
+
+@contextmanager
+def span(name, histogram=None, **labels):
+    """Time a block into histogram (with labels) and the current run's record"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        add_span(name, elapsed)
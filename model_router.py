@@ -0,0 +1,240 @@
+"""Per-stage model tiers and a health-aware router between their models.
+
+Each LLM stage runs on a tier: the profiles on 'fast', questions and answers
+on 'strong'. A tier is an ordered list of models, the primary first and its
+fallbacks after it. Every model has its own LLMPool, whose call attempts feed
+a rolling ModelHealth window. A model whose recent error rate or average
+latency is over the limit is shed: the tier's calls go to its next healthy
+model until the bad samples age out of the window, after which the primary is
+tried again. A call that fails on one model is retried on the next.
+"""
+import copy
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+import metrics
+from llm_pool import LLMPool, LLMUnavailable, set_call
+
+# Tier name -> (comma-separated models, primary first; max average call latency in seconds)
+DEFAULT_TIERS = {
+    'fast': ('gemini/gemini-1.5-flash,gemini/gemini-1.5-flash-8b', 20),
+    'strong': ('gemini/gemini-1.5-pro,gemini/gemini-1.5-flash', 60),
+}
+DEFAULT_STAGE_TIERS = {
+    'recruiter_profile': 'fast',
+    'candidate_profile': 'fast',
+    'questions': 'strong',
+    'answers': 'strong',
+}
+
+MODEL_CALLS = metrics.Counter('llm_model_calls_total', 'Routed LLM calls by the model that took them and outcome',
+                              ['model', 'outcome'])
+MODEL_FALLBACKS = metrics.Counter('llm_model_fallbacks_total',
+                                  'Calls routed past a tier\'s primary model, by reason', ['tier', 'reason'])
+
+
+class ModelHealth:
+    """Rolling window of a model's recent call attempts: latency of successes and error count"""
+
+    def __init__(self, window_seconds=120, max_samples=100):
+        self.window_seconds = window_seconds
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self):
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            samples = list(self._samples)
+        latencies = [latency for _, latency, ok in samples if ok]
+        errors = len(samples) - len(latencies)
+        return {
+            'samples': len(samples),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 3) if samples else 0.0,
+            'avg_latency': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        }
+
+
+class ModelTier:
+    """Ordered models for a group of stages; the first is the primary"""
+
+    def __init__(self, name, models, max_latency=None):
+        if not models:
+            raise ValueError(f"Model tier {name!r} has no models")
+        self.name = name
+        self.models = list(models)
+        self.max_latency = max_latency
+
+
+class ModelRouter:
+    """Routes each stage's LLM calls to the healthiest model of its tier.
+
+    factory(model) builds a client for a model name; a pool of such clients
+    is created per model on first use with pool_options (size, retries,
+    limiter). A model is shed from a tier once it has at least min_samples
+    attempts in the last window_seconds and either more than max_error_rate
+    of them failed or their average latency is above the tier's max_latency.
+    """
+
+    def __init__(self, factory, tiers, stage_tiers, pool_options=None, window_seconds=120, min_samples=5,
+                 max_error_rate=0.5):
+        unknown = sorted(set(stage_tiers.values()) - set(tiers))
+        if unknown:
+            raise ValueError(f"Stages use undefined model tiers: {', '.join(unknown)}")
+        self.factory = factory
+        self.tiers = tiers
+        self.stage_tiers = stage_tiers
+        self.pool_options = pool_options or {}
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _create(self, model):
+        # Looked up per client so a replaced factory (e.g. a stub) applies to existing pools
+        return self.factory(model)
+
+    def pool(self, model):
+        """The model's client pool, created on first use"""
+        with self._lock:
+            pool = self._pools.get(model)
+            if pool is None:
+                pool = self._pools[model] = LLMPool(factory=functools.partial(self._create, model),
+                                                    health=ModelHealth(self.window_seconds), **self.pool_options)
+            return pool
+
+    def tier_for(self, stage):
+        return self.stage_tiers.get(stage) or next(iter(self.tiers))
+
+    def degraded(self, model, tier):
+        """Why the model should be shed from tier ('error_rate' or 'latency'), or None if it is healthy"""
+        with self._lock:
+            pool = self._pools.get(model)
+        if pool is None:
+            return None
+        health = pool.health.snapshot()
+        if health['samples'] < self.min_samples:
+            return None
+        if health['error_rate'] > self.max_error_rate:
+            return 'error_rate'
+        if tier.max_latency and health['avg_latency'] is not None and health['avg_latency'] > tier.max_latency:
+            return 'latency'
+        return None
+
+    def candidates(self, tier):
+        """Tier's models in the order to try them: healthy ones first, each group in configured order"""
+        healthy, shed = [], []
+        for model in tier.models:
+            reason = self.degraded(model, tier)
+            (shed if reason else healthy).append((model, reason))
+        return healthy + shed
+
+    def warm(self):
+        """Fill the pools of each tier's primary model"""
+        for model in dict.fromkeys(tier.models[0] for tier in self.tiers.values()):
+            self.pool(model).warm()
+
+    @contextmanager
+    def borrow(self, tier_name, wrap=None):
+        """Borrow a client whose calls are routed across the tier's models for a with-block.
+
+        A client of the healthiest model is held for the block; calls routed to
+        another model borrow one of its clients for that call. wrap(client),
+        if given, is applied to every client before it is called (e.g. the
+        response cache).
+        """
+        tier = self.tiers[tier_name]
+        with ExitStack() as stack:
+            held_model = held = error = None
+            for model, _ in self.candidates(tier):
+                try:
+                    held = stack.enter_context(self.pool(model).borrow())
+                except LLMUnavailable as e:
+                    error = e
+                    continue
+                held_model = model
+                break
+            if held is None:
+                raise error
+            held_client = wrap(held) if wrap else held
+            router = self
+
+            def call(*args, **kwargs):
+                candidates = router.candidates(tier)
+                if candidates[0][0] != tier.models[0]:
+                    MODEL_FALLBACKS.inc(tier=tier.name, reason=dict(candidates)[tier.models[0]])
+                error = None
+                for index, (model, _) in enumerate(candidates):
+                    if index:
+                        MODEL_FALLBACKS.inc(tier=tier.name, reason='call_failed')
+                    try:
+                        if model == held_model:
+                            response = held_client.call(*args, **kwargs)
+                        else:
+                            with router.pool(model).borrow() as client:
+                                response = (wrap(client) if wrap else client).call(*args, **kwargs)
+                    except Exception as e:
+                        error = e
+                        MODEL_CALLS.inc(model=model, outcome='error')
+                        if index + 1 < len(candidates):
+                            print(f"⚠️ Warning: {model} failed ({e}), trying {candidates[index + 1][0]}")
+                        continue
+                    MODEL_CALLS.inc(model=model, outcome='ok')
+                    metrics.count(f"model:{model}")
+                    return response
+                raise error
+
+            yield set_call(copy.copy(held), call)
+
+    def stats(self):
+        with self._lock:
+            pools = dict(self._pools)
+        tiers = {}
+        for name, tier in self.tiers.items():
+            candidates = self.candidates(tier)
+            tiers[name] = {'models': tier.models, 'max_latency': tier.max_latency,
+                           'order': [model for model, _ in candidates],
+                           'shed': {model: reason for model, reason in candidates if reason}}
+        models = {}
+        for model, pool in pools.items():
+            models[model] = pool.stats()
+            models[model].pop('limiter', None)
+            models[model]['health'] = pool.health.snapshot()
+        stats = {'stage_tiers': dict(self.stage_tiers), 'tiers': tiers, 'models': models,
+                 'in_use': sum(info['in_use'] for info in models.values())}
+        limiter = self.pool_options.get('limiter')
+        if limiter is not None:
+            stats['limiter'] = limiter.stats()
+        return stats
+
+
+def load_tiers():
+    """Model tiers from LLM_<TIER>_MODELS and LLM_<TIER>_MAX_LATENCY, over DEFAULT_TIERS"""
+    tiers = {}
+    for name, (models, max_latency) in DEFAULT_TIERS.items():
+        models = os.getenv(f"LLM_{name.upper()}_MODELS", models)
+        max_latency = float(os.getenv(f"LLM_{name.upper()}_MAX_LATENCY", str(max_latency)))
+        tiers[name] = ModelTier(name, [model.strip() for model in models.split(',') if model.strip()],
+                                max_latency or None)
+    return tiers
+
+
+def load_stage_tiers():
+    """Stage -> tier from LLM_STAGE_TIERS ('questions=fast,answers=strong'), over DEFAULT_STAGE_TIERS"""
+    stage_tiers = dict(DEFAULT_STAGE_TIERS)
+    for pair in os.getenv('LLM_STAGE_TIERS', '').split(','):
+        if '=' in pair:
+            stage, tier = pair.split('=', 1)
+            stage_tiers[stage.strip()] = tier.strip()
+    return stage_tiers
@@ -0,0 +1,702 @@
+import contextvars
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+import admission
+import checkpoints
+import metrics
+from dag import Stage, StageError, run_dag
+from github_client import fetch_github_data
+from llm_cache import LLMCache
+from llm_pool import LLMUnavailable
+from model_router import ModelRouter, load_stage_tiers, load_tiers
+import question_bank
+from result_store import hash_inputs
+from token_budget import TokenAccounting
+
+# Pipeline stages reported through progress_callback, in dependency order
+STAGES = ['github', 'recruiter_profile', 'candidate_profile', 'questions', 'answers']
+
+# Stages that call the LLM, each on its model tier (see model_router)
+LLM_STAGES = ['recruiter_profile', 'candidate_profile', 'questions', 'answers']
+
+# Separator crewai uses when joining the outputs of context tasks
+CONTEXT_SEPARATOR = "\n\n----------\n\n"
+
+RECRUITER_PROMPT = "Create a personality profile for the recruiter based on: {recruiter_text}"
+
+CANDIDATE_PROMPT = """
+        Given the following resume:\n{resume_text}\n\n
+        and REAL GitHub profile data:\n{github_info_text}\n\n
+        
+        Analyze the candidate's technical skills, programming languages, project experience, and coding patterns based on their actual GitHub repositories and activity.
+        Pay attention to:
+        - Programming languages used in repositories
+        - Project complexity and diversity
+        - Repository descriptions and topics
+        - Community engagement (stars, forks)
+        - Recent activity and consistency
+        
+        Generate a comprehensive candidate profile.
+        """
+
+STAGE_SECONDS = metrics.Histogram('interview_stage_seconds', 'Duration of each pipeline stage', ['stage', 'status'])
+RUN_SECONDS = metrics.Histogram('interview_run_seconds', 'Duration of a whole interview run', ['status'])
+LLM_BORROW_SECONDS = metrics.Histogram('llm_borrow_wait_seconds', 'Time a run waits for a pooled LLM client')
+PROMPT_TOKENS = metrics.Counter('llm_prompt_tokens_total', 'Estimated prompt tokens sent per stage', ['stage'])
+PROMPT_TOKENS_SAVED = metrics.Counter('llm_prompt_tokens_saved_total', 'Estimated prompt tokens removed by compaction',
+                                      ['stage'])
+
+# Questions are answered in parallel batches of ANSWER_BATCH_SIZE (0 answers them all in one call),
+# with at most ANSWER_CONCURRENCY batches in flight; failed batches are retried ANSWER_BATCH_RETRIES times
+ANSWER_BATCH_SIZE = int(os.getenv('ANSWER_BATCH_SIZE', '5'))
+ANSWER_CONCURRENCY = int(os.getenv('ANSWER_CONCURRENCY', '4'))
+ANSWER_BATCH_RETRIES = int(os.getenv('ANSWER_BATCH_RETRIES', '1'))
+
+# Reuse the recruiter profile and questions generated for a near-identical job posting (see question_bank).
+# Off by default: banked questions are written without the candidate's profile, so they are not tailored to them
+QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', '0').lower() not in ('0', 'false', 'no')
+
+# Save each stage's output so a retry of a failed run resumes where it stopped (see checkpoints)
+CHECKPOINTS_ENABLED = os.getenv('CHECKPOINTS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+QUESTION_RE = re.compile(r'^\s*(?:\*\*)?\s*(\d+)[.)]\s*(?:\*\*)?\s*(.+?)\s*$')
+CATEGORY_RE = re.compile(r'\(\d+(?:-\d+)?\s+questions?\)', re.IGNORECASE)
+# Anything numbered like a question, in the formats QUESTION_RE reads and others ('Q1:', '(1)', '1 -')
+NUMBERED_LINE_RE = re.compile(r'^(?:\*\*)?\s*(?:Q(?:uestion)?\s*)?\(?\d+\s*[.):-]', re.IGNORECASE)
+# Longest unnumbered line, in words, read as a section title such as 'Problem Solving & System Design'
+HEADING_MAX_WORDS = 6
+
+# Process-wide cache of LLM responses, shared by every interview run
+llm_cache = LLMCache(
+    directory=os.getenv('LLM_CACHE_DIR', os.path.join('.cache', 'llm')),
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '256')),
+    max_disk_bytes=int(os.getenv('LLM_CACHE_MAX_MB', '100')) * 1024 * 1024,
+    ttl=int(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600))),
+)
+
+# crewai takes seconds to import and is only needed to actually run an interview,
+# so it is imported inside the functions that use it rather than at module load.
+
+def preload():
+    """Import the heavy pipeline dependencies and warm the LLM pools ahead of the first interview"""
+    import crewai  # noqa: F401
+    try:
+        llm_router.warm()
+    except LLMUnavailable as e:
+        print(f"⚠️ Warning: could not warm LLM pool: {e}")
+
+def create_llm(model):
+    """Create a Gemini LLM client; fails loudly instead of falling back to a keyless client"""
+    from crewai import LLM
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise LLMUnavailable("GOOGLE_API_KEY is not set")
+    return LLM(
+        model=model,
+        api_key=api_key
+    )
+
+# How new LLM clients are checked before they enter a pool:
+# probe (model settings only, no request), ping (one tiny request, checks key and model) or off
+LLM_HEALTH_CHECK = os.getenv('LLM_HEALTH_CHECK', 'probe').lower()
+
+def check_llm(client, mode=None):
+    """Health check for a new LLM client; True if it can be pooled
+
+    probe asks the client for its model's capabilities and context window,
+    which fails for an unknown or misconfigured model without a request.
+    ping also sends a one-word prompt, so a rejected key or unavailable model
+    is found at startup rather than by the first interview.
+    """
+    mode = mode or LLM_HEALTH_CHECK
+    if mode == 'off':
+        return True
+    if not callable(getattr(client, 'call', None)):
+        return False
+    try:
+        if hasattr(client, 'supports_stop_words'):
+            client.supports_stop_words()
+        if hasattr(client, 'get_context_window_size') and client.get_context_window_size() <= 0:
+            return False
+        if mode == 'ping':
+            response = client.call([{'role': 'user', 'content': 'Reply with the single word OK.'}])
+            return isinstance(response, str) and bool(response.strip())
+    except Exception as e:
+        print(f"⚠️ Warning: LLM health check failed: {e}")
+        return False
+    return True
+
+# Per-stage model tiers, each model with its own pool of warm clients; transient errors
+# are retried per call, and slow or failing models are shed to the tier's fallbacks
+llm_router = ModelRouter(
+    factory=create_llm,
+    tiers=load_tiers(),
+    stage_tiers=load_stage_tiers(),
+    pool_options=dict(
+        size=int(os.getenv('LLM_POOL_SIZE', '4')),
+        max_retries=int(os.getenv('LLM_MAX_RETRIES', '3')),
+        base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', '1.0')),
+        max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', '30')),
+        limiter=admission.get_limiter(),
+        health_check=check_llm,
+    ),
+    window_seconds=float(os.getenv('LLM_HEALTH_WINDOW_SECONDS', '120')),
+    min_samples=int(os.getenv('LLM_HEALTH_MIN_SAMPLES', '5')),
+    max_error_rate=float(os.getenv('LLM_MAX_ERROR_RATE', '0.5')),
+)
+
+def format_interview_result(result_text):
+    """Format the interview result for better readability"""
+    formatted_result = f"""
+INTERVIEW SIMULATION RESULTS
+{'='*50}
+
+This simulation contains both interview questions and candidate responses.
+The format shows: Q: [Question] followed by A: [Answer]
+
+{'='*50}
+
+{result_text}
+
+{'='*50}
+SIMULATION COMPLETE
+"""
+    return formatted_result
+
+
+def format_github_info(github_url, github_data):
+    """Render fetched GitHub data as the text block given to the candidate analyst"""
+    if 'error' in github_data:
+        return f"GitHub URL: {github_url} (Could not fetch live data)"
+
+    activity = github_data['activity']
+    last_push = (f"{activity['last_pushed_days_ago']} days ago" if activity['last_pushed_days_ago'] is not None
+                 else 'unknown')
+    languages = ', '.join(f"{entry['language']} {entry['share']:.0%}" for entry in github_data['languages'])
+    github_info_text = f"""
+REAL GITHUB PROFILE DATA for {github_url}:
+
+Personal Info:
+- Name: {github_data['name']}
+- Bio: {github_data['bio']}
+- Company: {github_data['company']}, Location: {github_data['location']}, Blog: {github_data['blog']}
+- Followers: {github_data['followers']}, Following: {github_data['following']}
+- Account Created: {github_data['created_at'][:10]}
+
+Repositories: {github_data['public_repos']} public, {github_data['repos_analyzed']} analysed \
+({github_data['forks_skipped']} forks skipped)
+- Total stars: {github_data['total_stars']}, total forks: {github_data['total_forks']}
+- Languages by code size: {languages or 'Not available'}
+- Activity: {activity['pushed_30d']} repos pushed in the last 30 days, {activity['pushed_90d']} in 90 days, \
+{activity['pushed_365d']} in a year; last push {last_push}
+
+Top Repositories (by stars and recent activity):
+"""
+    for i, repo in enumerate(github_data['top_repositories'], 1):
+        topics = f" [{', '.join(repo['topics'])}]" if repo['topics'] else ''
+        github_info_text += (f"{i}. {repo['name']} ({repo['language']}, {repo['stars']} stars, "
+                             f"pushed {repo['pushed_at'][:10]}) - {repo['description']}{topics}\n")
+    if github_data['partial']:
+        github_info_text += "\n(Partial data: some repositories could not be fetched in time)\n"
+    return github_info_text
+
+def run_task(task, *context_outputs, stage=None, accounting=None):
+    """Execute a single crew task, passing upstream outputs as its context
+
+    With accounting, the prompt is measured against the stage's token budget
+    first and oversized context outputs are compacted.
+    """
+    if accounting is not None and stage:
+        context_outputs = accounting.fit(stage, task.description, context_outputs)
+    context = CONTEXT_SEPARATOR.join(context_outputs) if context_outputs else None
+    return task.execute_sync(agent=task.agent, context=context).raw
+
+def load_github_info(github_url):
+    """Fetch a candidate's GitHub data and render it for the candidate analyst"""
+    print("🔍 Fetching GitHub profile data...")
+    github_data = fetch_github_data(github_url)
+    if 'error' in github_data:
+        print(f"⚠️ Warning: {github_data['error']}")
+    else:
+        print("✅ GitHub data fetched successfully!")
+    return format_github_info(github_url, github_data)
+
+@contextmanager
+def borrow_llms(stages=LLM_STAGES, use_cache=True):
+    """Borrow a routed LLM client per model tier for one run; yields {stage: client}
+
+    Calls are served through the shared response cache.
+    """
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        clients = {}
+        for tier in dict.fromkeys(llm_router.tier_for(stage) for stage in stages):
+            clients[tier] = stack.enter_context(
+                llm_router.borrow(tier, wrap=lambda client: llm_cache.wrap(client, bypass=not use_cache)))
+        waited = time.perf_counter() - start
+        LLM_BORROW_SECONDS.observe(waited)
+        metrics.add_span('llm_borrow', waited)
+        yield {stage: clients[llm_router.tier_for(stage)] for stage in stages}
+
+def models_used(record):
+    """Models that served the run's LLM calls, from its 'model:<name>' counts"""
+    return sorted(name.split(':', 1)[1] for name in record.counts if name.startswith('model:'))
+
+def generate_recruiter_profile(llm, recruiter_text, accounting=None):
+    from crewai import Agent, Task
+    if accounting is not None:
+        recruiter_text, = accounting.fit('recruiter_profile', RECRUITER_PROMPT.format(recruiter_text=''),
+                                         [recruiter_text])
+    recruiter_agent = Agent(
+        role="Recruiter Research Analyst",
+        goal="Analyze recruiter input and generate a recruiter personality profile",
+        backstory="Expert at profiling recruiters to simulate their interview style.",
+        llm=llm,
+        verbose=False,
+    )
+    recruiter_task = Task(
+        description=RECRUITER_PROMPT.format(recruiter_text=recruiter_text),
+        expected_output="A detailed recruiter character profile based on traits, style, and values.",
+        agent=recruiter_agent
+    )
+    return run_task(recruiter_task)
+
+def generate_candidate_profile(llm, resume_text, github_info_text, accounting=None):
+    from crewai import Agent, Task
+    if accounting is not None:
+        resume_text, github_info_text = accounting.fit(
+            'candidate_profile', CANDIDATE_PROMPT.format(resume_text='', github_info_text=''),
+            [resume_text, github_info_text])
+    candidate_agent = Agent(
+        role="Candidate Research Analyst",
+        goal="Analyze GitHub and resume to generate a candidate profile",
+        backstory="Expert in analyzing resumes and GitHub profiles to identify strengths and skills.",
+        llm=llm,
+        verbose=False,
+    )
+    candidate_task = Task(
+        description=CANDIDATE_PROMPT.format(resume_text=resume_text, github_info_text=github_info_text),
+        expected_output="Detailed candidate profile based on resume and REAL GitHub data including technical skills, project analysis, and communication style.",
+        agent=candidate_agent
+    )
+    return run_task(candidate_task)
+
+def generate_questions(llm, job_description, *profiles, accounting=None):
+    """Generate the question set; profiles are the recruiter (and optionally candidate) profiles
+
+    Without a candidate profile the questions are pitched at the level the
+    job asks for, so the set suits any candidate for it.
+    """
+    from crewai import Agent, Task
+    if len(profiles) > 1:
+        based_on = "the recruiter and candidate profiles"
+        tailoring = "Tailor the difficulty and style to match the recruiter's approach and the candidate's experience level."
+    else:
+        based_on = "the recruiter profile and the job"
+        tailoring = ("Tailor the style to match the recruiter's approach and set the difficulty by the seniority the job "
+                     "description asks for. The candidate is not known yet, so do not assume anything about their "
+                     "background; ask about their experience and projects in general terms.")
+    interviewer_agent = Agent(
+        role="Mock Interviewer",
+        goal=f"Generate a list of questions based on {based_on}",
+        backstory="Simulates the recruiter and prepares technical interview questions tailored to the job.",
+        llm=llm,
+        verbose=False,
+    )
+    interview_task = Task(
+        description=f"""
+        Generate 15-20 comprehensive interview questions for this job position:
+        
+        Job Description: {job_description}
+        
+        Create questions in these categories:
+        1. Technical Skills (5-6 questions)
+        2. Problem Solving & System Design (3-4 questions)  
+        3. Experience & Projects (3-4 questions)
+        4. Behavioral & Cultural Fit (2-3 questions)
+        5. Role-Specific Scenarios (2-3 questions)
+        
+        Format each question clearly and number them. {tailoring}
+        """,
+        expected_output="A numbered list of 15-20 well-structured interview questions organized by category.",
+        agent=interviewer_agent
+    )
+    return run_task(interview_task, *profiles, stage='questions', accounting=accounting)
+
+def generate_answers(llm, questions, candidate_profile, accounting=None):
+    from crewai import Agent, Task
+    candidate_mock_agent = Agent(
+        role="Mock Candidate",
+        goal="Answer interview questions in the tone of the candidate",
+        backstory="Simulates the candidate and answers interview questions accurately and concisely.",
+        llm=llm,
+        verbose=False,
+    )
+    answer_task = Task(
+        description="""
+        For each interview question generated above, provide both the QUESTION and the ANSWER in this format:
+        
+        **Q: [Question number]. [Full question text]**
+        
+        **A:** [Detailed answer in the candidate's style]
+        
+        Make sure to include both the original questions and the candidate's responses for a complete interview simulation.
+        """,
+        expected_output="Complete interview Q&A pairs with questions clearly stated followed by detailed candidate responses.",
+        agent=candidate_mock_agent
+    )
+    return run_task(answer_task, questions, candidate_profile, stage='answers', accounting=accounting)
+
+def _is_category(text):
+    """Unmistakable category headings like '**1. Technical Skills (5-6 questions)**' or 'Behavioral:'"""
+    stripped = text.strip('*# ').strip()
+    return not stripped or stripped.endswith(':') or bool(CATEGORY_RE.search(stripped))
+
+def _is_bold(text):
+    return text.startswith('**') and text.endswith('**')
+
+def _is_heading(text, next_line=None, indented=False):
+    """Category headings: _is_category, a bold line without a question mark, or a short plain title
+
+    A question may itself be written in bold without a '?', so a bold numbered
+    line is only taken for a heading when the next line starts plain
+    (not bold) numbered items. An unnumbered line like 'Behavioral' is a
+    heading when it is a few words without sentence punctuation, is not
+    indented and a numbered item follows; otherwise it continues the question
+    above it.
+    """
+    if _is_category(text):
+        return True
+    numbered = bool(QUESTION_RE.match(text))
+    next_numbered = next_line is not None and bool(QUESTION_RE.match(next_line))
+    if _is_bold(text) and '?' not in text:
+        return not numbered or (next_numbered and not _is_bold(next_line))
+    title = text.strip('*# ').strip()
+    return (not numbered and not indented and next_numbered and len(title.split()) <= HEADING_MAX_WORDS
+            and title[:1].isupper() and not title.endswith(('?', '.', ',', ';')))
+
+def _lines(questions_text):
+    """(stripped line, next non-blank stripped line, indented) for each line"""
+    lines = questions_text.splitlines()
+    stripped = [line.strip() for line in lines]
+    for index, line in enumerate(lines):
+        next_line = next((other for other in stripped[index + 1:] if other), None)
+        yield stripped[index], next_line, line[:1].isspace()
+
+def parse_questions(questions_text):
+    """Parse the interviewer's numbered list into question strings, in order.
+
+    Category headings are skipped and a question's continuation lines are
+    joined onto it. Questions are renumbered by position by the caller, so
+    numbering that restarts per category does not matter.
+    """
+    questions = []
+    current = None
+    for stripped, next_line, indented in _lines(questions_text):
+        heading = _is_heading(stripped, next_line, indented)
+        match = QUESTION_RE.match(stripped)
+        if match and not heading:
+            current = match.group(2).replace('**', '').strip()
+            questions.append(current)
+        elif not stripped or stripped.startswith('#') or heading:
+            current = None
+        elif current is not None:
+            current = f"{current} {stripped.replace('**', '')}"
+            questions[-1] = current
+    return questions
+
+def count_numbered_lines(questions_text):
+    """Lines that look like numbered questions, including forms parse_questions does not read ('Q1:', '(1)')
+
+    Headings are not counted, so this matches len(parse_questions()) unless
+    some questions were written in a format the parser misses.
+    """
+    return sum(1 for stripped, next_line, indented in _lines(questions_text)
+               if NUMBERED_LINE_RE.match(stripped) and not _is_heading(stripped, next_line, indented))
+
+def answer_question_batch(llm, numbered_questions, candidate_profile, accounting=None):
+    """Answer one batch of (number, question) pairs in the candidate's voice"""
+    from crewai import Agent, Task
+    candidate_mock_agent = Agent(
+        role="Mock Candidate",
+        goal="Answer interview questions in the tone of the candidate",
+        backstory="Simulates the candidate and answers interview questions accurately and concisely.",
+        llm=llm,
+        verbose=False,
+    )
+    question_list = "\n".join(f"{number}. {question}" for number, question in numbered_questions)
+    answer_task = Task(
+        description=f"""
+        Answer these interview questions as the candidate:
+
+        {question_list}
+
+        For each question provide both the QUESTION and the ANSWER in this format, keeping the question numbers above:
+        
+        **Q: [Question number]. [Full question text]**
+        
+        **A:** [Detailed answer in the candidate's style]
+        """,
+        expected_output="Interview Q&A pairs for the listed questions, each question followed by a detailed candidate response.",
+        agent=candidate_mock_agent
+    )
+    answers = run_task(answer_task, candidate_profile, stage='answers', accounting=accounting)
+    if not split_qa_pairs(answers):
+        # Keep the text: an unexpected format is still an answer, as with the single answer task
+        print(f"⚠️ Warning: answers for questions {numbered_questions[0][0]}-{numbered_questions[-1][0]} "
+              "have no Q&A pairs, keeping the raw text")
+    return answers
+
+def answer_questions(llm, questions, candidate_profile, accounting=None, on_batch=None, checkpoint=None):
+    """Answer the interviewer's questions in parallel batches and merge them in question order.
+
+    Falls back to a single answer task when the questions cannot be parsed
+    into a list, fewer questions are parsed than there are numbered lines, or
+    batching is disabled. on_batch(answers_text) is called as
+    each batch completes, in completion order. Only batches that fail are
+    retried; if one still fails after ANSWER_BATCH_RETRIES its error is raised.
+    With a checkpoint (checkpoints.RunCheckpoints) each answered batch is
+    saved, and batches answered by an earlier attempt are not asked again.
+    """
+    parsed = parse_questions(questions)
+    if len(parsed) < count_numbered_lines(questions):
+        # Something numbered was not recognised as a question; let one task see the whole list
+        print("⚠️ Warning: could not parse every question, answering them in a single task")
+        parsed = []
+    if ANSWER_BATCH_SIZE <= 0 or len(parsed) < 2:
+        answers = generate_answers(llm, questions, candidate_profile, accounting)
+        if on_batch:
+            on_batch(answers)
+        return answers
+
+    numbered = list(enumerate(parsed, 1))
+    batches = [numbered[i:i + ANSWER_BATCH_SIZE] for i in range(0, len(numbered), ANSWER_BATCH_SIZE)]
+    names = [f"answers:{batch[0][0]}-{batch[-1][0]}" for batch in batches]
+    results = [checkpoint.get(name) if checkpoint is not None else None for name in names]
+    pending = [index for index, answers in enumerate(results) if answers is None]
+    if on_batch:
+        for answers in results:
+            if answers is not None:
+                on_batch(answers)
+    with ThreadPoolExecutor(max_workers=max(1, min(ANSWER_CONCURRENCY, len(batches)))) as executor:
+        for attempt in range(ANSWER_BATCH_RETRIES + 1):
+            # Each batch runs in a copy of this context so its LLM calls count towards the run's metrics
+            futures = {executor.submit(contextvars.copy_context().run, answer_question_batch,
+                                       llm, batches[index], candidate_profile, accounting): index
+                       for index in pending}
+            failed = []
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    failed.append(index)
+                    error = e
+                    continue
+                if checkpoint is not None:
+                    checkpoint.save(names[index], results[index])
+                if on_batch:
+                    on_batch(results[index])
+            if not failed:
+                break
+            pending = sorted(failed)
+            if attempt < ANSWER_BATCH_RETRIES:
+                print(f"🔁 Retrying {len(pending)} failed answer batch(es): {error}")
+        else:
+            raise error
+    return "\n\n".join(results)
+
+def split_qa_pairs(answers_text):
+    """Split the answer stage output into individual '**Q: ... **A: ...' blocks"""
+    pairs = re.split(r'(?=\*\*Q:)', answers_text)
+    return [pair.strip() for pair in pairs if pair.strip().startswith('**Q:')]
+
+def instrument_stages(stages, record):
+    """Wrap stage functions so they report to the stage histogram and run in record's context"""
+    def wrap(stage):
+        def run(inputs):
+            start = time.perf_counter()
+            status = 'failed'
+            try:
+                with metrics.bind_run(record):
+                    output = stage.fn(inputs)
+                status = 'done'
+                return output
+            finally:
+                elapsed = time.perf_counter() - start
+                STAGE_SECONDS.observe(elapsed, stage=stage.name, status=status)
+                record.add_span(f"stage:{stage.name}", elapsed)
+        return Stage(stage.name, run, stage.deps)
+    return [wrap(stage) for stage in stages]
+
+def checkpoint_stages(stages, checkpoint):
+    """Serve stages finished by an earlier attempt from checkpoint, and checkpoint the rest as they finish"""
+    def wrap(stage):
+        saved = checkpoint.get(stage.name)
+        if saved is not None:
+            return Stage(stage.name, lambda inputs: saved)
+
+        def run(inputs):
+            output = stage.fn(inputs)
+            checkpoint.save(stage.name, output)
+            return output
+        return Stage(stage.name, run, stage.deps)
+    return [wrap(stage) for stage in stages]
+
+def record_tokens(report):
+    for stage, info in report['stages'].items():
+        PROMPT_TOKENS.inc(info['prompt_tokens'], stage=stage)
+        PROMPT_TOKENS_SAVED.inc(info['saved_tokens'], stage=stage)
+
+def find_question_set(job_description, recruiter_text, use_cache=True):
+    """A stored question set for a near-duplicate posting, or None (also when the bank fails)"""
+    if not QUESTION_BANK_ENABLED or not use_cache:
+        return None
+    try:
+        match = question_bank.get_bank().lookup(job_description, recruiter_text)
+    except Exception as e:
+        print(f"⚠️ Warning: question bank lookup failed: {e}")
+        return None
+    if match:
+        print(f"♻️ Reusing question set {match['id']} (similarity {match['similarity']:.2f})")
+    return match
+
+def store_question_set(job_description, recruiter_text, recruiter_profile, questions):
+    if not QUESTION_BANK_ENABLED:
+        return
+    try:
+        question_bank.get_bank().add(job_description, recruiter_text, recruiter_profile, questions)
+    except Exception as e:
+        print(f"⚠️ Warning: could not store question set: {e}")
+
+def print_timings(timings):
+    for stage, timing in timings.items():
+        print(f"⏱️ {stage}: {timing['start']:.2f}s -> {timing['end']:.2f}s ({timing['duration']:.2f}s)")
+
+def print_tokens(report):
+    print(f"🧮 Prompt tokens: ~{report['prompt_tokens']} (saved ~{report['saved_tokens']} by compaction)")
+
+def run_interview_automation(recruiter_text, resume_text, github_url, job_description, progress_callback=None,
+                             use_cache=True, run_id=None):
+    """Run the interview automation process
+
+    Stages run as a dependency graph on LLM clients borrowed from the warm
+    pools of their model tiers (see model_router): the GitHub fetch and the recruiter profile start together, both profiles run in parallel, and the questions and answers
+    wait only on the tasks they take as context.
+
+    progress_callback, if given, is called as progress_callback(stage, status, output)
+    for each name in STAGES: status is 'running' or 'failed' (output None), or
+    'done' with the stage's output. Questions are answered in parallel batches
+    and each batch's Q&A pairs are reported as 'partial' outputs (in completion
+    order) before the answers stage is done. Pass use_cache=False to skip cached LLM responses and force a fresh generation.
+
+    When the job description and recruiter text nearly match an earlier run,
+    that run's recruiter profile and questions are reused from the question
+    bank and only the candidate stages run; 'question_bank' in the result
+    says whether a set was reused. So that a banked set suits any candidate,
+    questions are written from the recruiter profile and job description
+    alone while the bank is enabled, and for the candidate's profile too
+    when it is not.
+
+    Each stage's prompt is checked against its token budget (see token_budget)
+    and the estimated per-stage token counts are returned under 'tokens'. A
+    per-run record of time spent in each stage, GitHub and LLM calls, cache
+    hits and retries is returned under 'metrics', and the models that served
+    the run under 'model'.
+
+    Stage outputs and answer batches are checkpointed under run_id (by
+    default a hash of the inputs and use_cache) as they finish, so retrying a
+    failed run resumes from its first unfinished stage. 'checkpoint' in the
+    result, successful or not, holds the run id and what was resumed.
+    """
+    def report(stage, status, output=None):
+        if progress_callback:
+            progress_callback(stage, status, output)
+
+    accounting = TokenAccounting()
+    record = metrics.RunRecord()
+    reused = find_question_set(job_description, recruiter_text, use_cache)
+    checkpoint = None
+
+    def checkpoint_summary():
+        return checkpoint.summary() if checkpoint is not None else None
+
+    try:
+        if CHECKPOINTS_ENABLED:
+            run_id = run_id or hash_inputs(recruiter_text=recruiter_text, resume_text=resume_text,
+                                           github_url=github_url, job_description=job_description,
+                                           use_cache=use_cache)
+            try:
+                checkpoint = checkpoints.get_store().run(run_id)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Warning: checkpoint store unavailable, running without checkpoints: {e}")
+        llm_stages = ['candidate_profile', 'answers'] if reused else LLM_STAGES
+        with metrics.bind_run(record), borrow_llms(llm_stages, use_cache) as llms:
+            def report_pairs(answers):
+                for pair in split_qa_pairs(answers):
+                    report('answers', 'partial', pair)
+
+            def answers_stage(inputs):
+                return answer_questions(llms['answers'], inputs['questions'], inputs['candidate_profile'], accounting,
+                                        on_batch=report_pairs, checkpoint=checkpoint)
+
+            def generate_question_set(inputs):
+                # Only a set written without the candidate's profile can be banked for other candidates
+                questions = generate_questions(llms['questions'], job_description, inputs['recruiter_profile'],
+                                               accounting=accounting)
+                store_question_set(job_description, recruiter_text, inputs['recruiter_profile'], questions)
+                return questions
+
+            if reused:
+                recruiter_stage = Stage('recruiter_profile', lambda inputs: reused['recruiter_profile'])
+                questions_stage = Stage('questions', lambda inputs: reused['questions'])
+            else:
+                recruiter_stage = Stage('recruiter_profile', lambda inputs: generate_recruiter_profile(
+                    llms['recruiter_profile'], recruiter_text, accounting))
+                if QUESTION_BANK_ENABLED:
+                    questions_stage = Stage('questions', generate_question_set, deps=['recruiter_profile'])
+                else:
+                    questions_stage = Stage('questions', lambda inputs: generate_questions(
+                        llms['questions'], job_description, inputs['recruiter_profile'], inputs['candidate_profile'],
+                        accounting=accounting), deps=['recruiter_profile', 'candidate_profile'])
+
+            stages = [
+                Stage('github', lambda inputs: load_github_info(github_url)),
+                recruiter_stage,
+                Stage('candidate_profile', lambda inputs: generate_candidate_profile(
+                    llms['candidate_profile'], resume_text, inputs['github'], accounting), deps=['github']),
+                questions_stage,
+                Stage('answers', answers_stage, deps=['questions', 'candidate_profile']),
+            ]
+            if checkpoint is not None:
+                stages = checkpoint_stages(stages, checkpoint)
+            outputs, timings = run_dag(instrument_stages(stages, record), progress_callback=report)
+    except StageError as e:
+        print(f"❌ Stage '{e.stage}' failed: {e}")
+        RUN_SECONDS.observe(time.perf_counter() - record.started, status='failed')
+        return {"success": False, "error": str(e), "failed_stage": e.stage, "metrics": record.to_dict(),
+                "checkpoint": checkpoint_summary()}
+    except Exception as e:
+        RUN_SECONDS.observe(time.perf_counter() - record.started, status='failed')
+        return {"success": False, "error": str(e), "metrics": record.to_dict(), "checkpoint": checkpoint_summary()}
+
+    RUN_SECONDS.observe(time.perf_counter() - record.started, status='done')
+    if checkpoint is not None:
+        checkpoint.clear()
+        resumed = checkpoint.summary()
+        if resumed['resumed_stages'] or resumed['resumed_answer_batches']:
+            print(f"♻️ Resumed from checkpoint: {', '.join(resumed['resumed_stages']) or 'no stages'}, "
+                  f"{resumed['resumed_answer_batches']} answer batch(es)")
+    print_timings(timings)
+    tokens = accounting.report()
+    print_tokens(tokens)
+    record_tokens(tokens)
+    formatted_result = format_interview_result(outputs['answers'])
+    question_set = {'reused': True, 'id': reused['id'], 'similarity': reused['similarity']} if reused else {'reused': False}
+    return {"success": True, "result": formatted_result, "timings": timings, "tokens": tokens,
+            "model": ', '.join(models_used(record)), "metrics": record.to_dict(), "question_bank": question_set,
+            "checkpoint": checkpoint_summary()}
@@ -0,0 +1,205 @@
+import array
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import metrics
+
+# MinHash signature length and LSH banding: 16 bands of 4 rows finds pairs above ~0.6 similarity
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+# Fixed so signatures stay comparable across processes and restarts
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5eed)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+WORD_RE = re.compile(r'[a-z0-9+#]+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_sets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    signature BLOB NOT NULL,
+    recruiter_profile TEXT NOT NULL,
+    questions TEXT NOT NULL
+)
+"""
+
+# Bumped when stored sets must be discarded; 1: only candidate-independent sets are stored
+SCHEMA_VERSION = 1
+
+QUESTION_BANK_LOOKUPS = metrics.Counter('question_bank_lookups_total', 'Question bank lookups by result', ['result'])
+
+
+def shingles(text):
+    """Hashed word 3-grams of text, ignoring case, punctuation and whitespace"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {zlib.crc32(' '.join(words[i:i + SHINGLE_WORDS]).encode('utf-8'))
+            for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text):
+    """MinHash signature: for each permutation, the smallest hashed shingle"""
+    hashed = shingles(text)
+    return array.array('Q', (min((a * x + b) % _PRIME for x in hashed) for a, b in _PERMUTATIONS))
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _bands(sig):
+    return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class QuestionBank:
+    """Reusable question sets, found by near-duplicate job posting and recruiter.
+
+    Each entry stores the recruiter profile and questions generated for a job
+    description and recruiter text, keyed by a MinHash signature of the two.
+    Signatures are bucketed by LSH bands in memory, so a lookup compares
+    against a handful of candidates rather than every stored posting. A
+    submission at or above threshold similarity reuses the stored set.
+    """
+
+    def __init__(self, path, threshold=0.8, max_entries=5000):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._signatures = {}
+        self._buckets = {}
+        self._counters = {'lookups': 0, 'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _connect(self):
+        """Open the database and load the LSH index (caller holds the lock)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                # Sets stored by earlier versions may have been written for one candidate's profile
+                conn.execute("DELETE FROM question_sets")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+            for entry_id, blob in conn.execute("SELECT id, signature FROM question_sets"):
+                self._index(entry_id, array.array('Q', blob))
+            self._conn = conn
+        return self._conn
+
+    def _index(self, entry_id, sig):
+        self._signatures[entry_id] = sig
+        for key in _bands(sig):
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+    def _unindex(self, entry_id):
+        sig = self._signatures.pop(entry_id, None)
+        if sig is None:
+            return
+        for key in _bands(sig):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    @staticmethod
+    def fingerprint(job_description, recruiter_text):
+        return signature(f"{job_description}\n{recruiter_text}")
+
+    def lookup(self, job_description, recruiter_text):
+        """Return the most similar stored set above the threshold, or None.
+
+        A hit is a dict with id, similarity, recruiter_profile and questions.
+        """
+        sig = self.fingerprint(job_description, recruiter_text)
+        with self._lock:
+            conn = self._connect()
+            self._counters['lookups'] += 1
+            candidates = set()
+            for key in _bands(sig):
+                candidates.update(self._buckets.get(key, ()))
+            best_id, best = None, 0.0
+            for entry_id in candidates:
+                score = similarity(sig, self._signatures[entry_id])
+                if score > best:
+                    best_id, best = entry_id, score
+
+            if best_id is None or best < self.threshold:
+                self._counters['misses'] += 1
+                QUESTION_BANK_LOOKUPS.inc(result='miss')
+                return None
+            row = conn.execute("SELECT recruiter_profile, questions FROM question_sets WHERE id = ?",
+                               (best_id,)).fetchone()
+            conn.execute("UPDATE question_sets SET uses = uses + 1, last_used_at = ? WHERE id = ?",
+                         (time.time(), best_id))
+            conn.commit()
+            self._counters['hits'] += 1
+        QUESTION_BANK_LOOKUPS.inc(result='hit')
+        return {'id': best_id, 'similarity': round(best, 3), 'recruiter_profile': row[0], 'questions': row[1]}
+
+    def add(self, job_description, recruiter_text, recruiter_profile, questions):
+        """Store a generated question set and return its id"""
+        sig = self.fingerprint(job_description, recruiter_text)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT INTO question_sets (created_at, last_used_at, signature, recruiter_profile, questions)"
+                " VALUES (?, ?, ?, ?, ?)", (now, now, sig.tobytes(), recruiter_profile, questions))
+            entry_id = cursor.lastrowid
+            self._index(entry_id, sig)
+            self._counters['stores'] += 1
+
+            # Drop the least recently used sets beyond max_entries
+            excess = len(self._signatures) - self.max_entries
+            if excess > 0:
+                stale = [row[0] for row in conn.execute(
+                    "SELECT id FROM question_sets ORDER BY last_used_at LIMIT ?", (excess,))]
+                conn.executemany("DELETE FROM question_sets WHERE id = ?", [(i,) for i in stale])
+                for stale_id in stale:
+                    self._unindex(stale_id)
+                self._counters['evictions'] += len(stale)
+            conn.commit()
+        return entry_id
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._signatures) if self._conn is not None else None
+        stats['threshold'] = self.threshold
+        stats['hit_rate'] = round(stats['hits'] / stats['lookups'], 3) if stats['lookups'] else 0.0
+        return stats
+
+
+_default_bank = None
+_default_bank_lock = threading.Lock()
+
+
+def get_bank():
+    """Return the process-wide question bank, creating it on first use"""
+    global _default_bank
+    with _default_bank_lock:
+        if _default_bank is None:
+            _default_bank = QuestionBank(
+                os.getenv('QUESTION_BANK_DB', os.path.join('.cache', 'question_bank.db')),
+                threshold=float(os.getenv('QUESTION_BANK_THRESHOLD', '0.8')),
+                max_entries=int(os.getenv('QUESTION_BANK_MAX_ENTRIES', '5000')),
+            )
+        return _default_bank
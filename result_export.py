@@ -0,0 +1,136 @@
+"""Streaming bulk export of stored interviews.
+
+Exports are produced as an iterator of byte chunks, one record at a time, so
+they can be sent as an HTTP response or written to a file without holding the
+export in memory:
+
+- jsonl: gzipped JSON Lines, one stored interview (with its text) per line
+- zip: one interview_result_<id>.txt per interview, in the text format of
+  earlier versions, which `python result_store.py import` reads back
+"""
+import gzip
+import json
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import metrics
+
+EXPORTED_RESULTS = metrics.Counter('result_export_records_total', 'Stored interviews written to bulk exports',
+                                   ['format'])
+
+
+def parse_time(value, end=False):
+    """Unix timestamp of a YYYY-MM-DD date or ISO 8601 time (local time), or None for an empty value.
+
+    With end=True a bare date means the end of that day, so since/until
+    ranges include the last day given.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD or an ISO 8601 time") from None
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.timestamp()
+
+
+def _created(record):
+    return datetime.fromtimestamp(record['created_at'])
+
+
+class _ChunkBuffer:
+    """Write-only file that collects bytes until they are taken by the streaming loop"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_jsonl_gz(records, compression_level=6):
+    """Gzipped JSON Lines, yielded as compressed chunks"""
+    buffer = _ChunkBuffer()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=compression_level, mtime=0) as archive:
+        for record in records:
+            line = dict(record, created=_created(record).isoformat(timespec='seconds'))
+            archive.write((json.dumps(line) + "\n").encode('utf-8'))
+            EXPORTED_RESULTS.inc(format='jsonl')
+            chunk = buffer.take()
+            if chunk:
+                yield chunk
+    yield buffer.take()
+
+
+def format_text(record):
+    """A stored interview in the results/*.txt format of earlier versions"""
+    return (f"Interview Automation Result\n"
+            f"Generated on: {_created(record).strftime('%Y-%m-%d %H:%M:%S')}\n"
+            + "=" * 50 + "\n\n"
+            + record['result'])
+
+
+def iter_zip(records, compression_level=6):
+    """Zip archive of text files, yielded as each file is written.
+
+    The output is not seekable, so zipfile writes each entry's sizes after its
+    data; only the entry being written and the small per-file index for the
+    central directory are kept in memory.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED,
+                         compresslevel=compression_level) as archive:
+        for record in records:
+            info = zipfile.ZipInfo(f"interview_result_{record['id']}.txt",
+                                   date_time=_created(record).timetuple()[:6])
+            archive.writestr(info, format_text(record), compress_type=zipfile.ZIP_DEFLATED,
+                             compresslevel=compression_level)
+            EXPORTED_RESULTS.inc(format='zip')
+            yield buffer.take()
+    # The central directory is written on close
+    yield buffer.take()
+
+
+# Export format -> (chunk iterator, content type, file extension)
+FORMATS = {
+    'jsonl': (iter_jsonl_gz, 'application/gzip', '.jsonl.gz'),
+    'zip': (iter_zip, 'application/zip', '.zip'),
+}
+
+
+def iter_export(records, fmt):
+    """Byte chunks of records exported in fmt ('jsonl' or 'zip')"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(sorted(FORMATS))}")
+    return FORMATS[fmt][0](records)
+
+
+def export_filename(fmt):
+    return f"interviews-{time.strftime('%Y%m%d-%H%M%S')}{FORMATS[fmt][2]}"
+
+
+def write_export(out, records, fmt):
+    """Write an export to a binary file object and return the number of records written"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for chunk in iter_export(counted(), fmt):
+        out.write(chunk)
+    return count
@@ -0,0 +1,271 @@
+"""Compressed, searchable SQLite store for finished interviews.
+
+Results written by older versions as results/*.txt can be imported with:
+    python result_store.py import results/*.txt
+
+and stored results exported as gzipped JSONL or a zip of text files with:
+    python result_store.py export -o interviews.jsonl.gz --since 2025-01-01
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import result_export
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    inputs_hash TEXT NOT NULL,
+    github_url TEXT,
+    model TEXT,
+    timings TEXT,
+    tokens TEXT,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_inputs_hash ON results (inputs_hash, id);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at, id);
+"""
+
+# Contentless index: the text lives (compressed) in results.body only
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(body, content='')"
+
+SUMMARY_COLUMNS = "r.id, r.created_at, r.inputs_hash, r.github_url, r.model, r.timings, r.tokens, r.size"
+
+MAX_PAGE_SIZE = 100
+
+# Rows read per query when iterating over results for an export
+EXPORT_BATCH_SIZE = 200
+
+
+def hash_inputs(**inputs):
+    """Stable hash of a run's inputs, ignoring surrounding whitespace"""
+    normalized = {key: value.strip() if isinstance(value, str) else value for key, value in inputs.items()}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResultStore:
+    """SQLite store for finished interviews.
+
+    Bodies are zlib-compressed and indexed in an FTS5 table so questions and
+    answers can be searched. Listing pages by id (keyset pagination) and never
+    reads bodies, so it costs the same at a hundred rows or a million.
+    """
+
+    def __init__(self, path, compression_level=6):
+        self.path = path
+        self.compression_level = compression_level
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.search_enabled = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                try:
+                    conn.execute(FTS_SCHEMA)
+                    self.search_enabled = True
+                except sqlite3.OperationalError:
+                    print("⚠️ Warning: SQLite was built without FTS5, result search is disabled")
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def save(self, result_text, inputs_hash, github_url=None, model=None, timings=None, tokens=None,
+             created_at=None):
+        """Store a finished interview and return its id"""
+        body = zlib.compress(result_text.encode('utf-8'), self.compression_level)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO results (created_at, inputs_hash, github_url, model, timings, tokens, size, body)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (created_at or time.time(), inputs_hash, github_url, model, json.dumps(timings) if timings else None,
+                 json.dumps(tokens) if tokens else None, len(result_text), body))
+            result_id = cursor.lastrowid
+            if self.search_enabled:
+                conn.execute("INSERT INTO results_fts (rowid, body) VALUES (?, ?)", (result_id, result_text))
+        return result_id
+
+    def get(self, result_id):
+        """Return a stored interview with its full text, or None"""
+        row = self._connect().execute(f"SELECT {SUMMARY_COLUMNS}, r.body FROM results r WHERE r.id = ?",
+                                      (result_id,)).fetchone()
+        if row is None:
+            return None
+        return self._full(row)
+
+    def iter_results(self, since=None, until=None, inputs_hash=None, batch_size=EXPORT_BATCH_SIZE):
+        """Yield stored interviews with their full text, oldest first.
+
+        since and until are Unix timestamps (until is exclusive). Rows are read
+        batch_size at a time by (created_at, id), and each batch is fetched in
+        full before it is yielded, so memory stays bounded however many results
+        match and no read transaction is held open while a slow consumer writes.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("r.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("r.created_at < ?")
+            params.append(until)
+        if inputs_hash:
+            where.append("r.inputs_hash = ?")
+            params.append(inputs_hash)
+        after = None
+        while True:
+            clauses, page_params = list(where), list(params)
+            if after is not None:
+                clauses.append("(r.created_at, r.id) > (?, ?)")
+                page_params.extend(after)
+            sql = f"SELECT {SUMMARY_COLUMNS}, r.body FROM results r"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY r.created_at, r.id LIMIT ?"
+            # Connections are per thread, and a streamed export may resume on another thread
+            rows = self._connect().execute(sql, page_params + [batch_size]).fetchall()
+            for row in rows:
+                yield self._full(row)
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['created_at'], rows[-1]['id'])
+
+    def list(self, limit=20, before=None, query=None, inputs_hash=None):
+        """One page of results, newest first, without their bodies.
+
+        Pass the returned next_cursor as before to fetch the following page.
+        query is an FTS5 match expression over the interview text.
+        """
+        conn = self._connect()
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM results r"
+        where, params = [], []
+        if query:
+            if not self.search_enabled:
+                raise ValueError("Full-text search is not available")
+            sql += " JOIN results_fts f ON f.rowid = r.id"
+            where.append("results_fts MATCH ?")
+            params.append(query)
+        if inputs_hash:
+            where.append("r.inputs_hash = ?")
+            params.append(inputs_hash)
+        if before is not None:
+            where.append("r.id < ?")
+            params.append(int(before))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if query:
+                raise ValueError(f"Invalid search query: {e}") from e
+            raise
+        results = [self._summary(row) for row in rows[:limit]]
+        next_cursor = results[-1]['id'] if len(rows) > limit else None
+        return {'results': results, 'next_cursor': next_cursor}
+
+    def _full(self, row):
+        record = self._summary(row)
+        record['result'] = zlib.decompress(row['body']).decode('utf-8')
+        return record
+
+    def _summary(self, row):
+        return {
+            'id': row['id'],
+            'created_at': row['created_at'],
+            'inputs_hash': row['inputs_hash'],
+            'github_url': row['github_url'],
+            'model': row['model'],
+            'timings': json.loads(row['timings']) if row['timings'] else None,
+            'tokens': json.loads(row['tokens']) if row['tokens'] else None,
+            'size': row['size'],
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide result store, creating it on first use"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultStore(os.getenv('RESULTS_DB', os.path.join('results', 'interviews.db')))
+        return _default_store
+
+
+def import_text_file(store, path):
+    """Store a results/*.txt file written by earlier versions and return its id"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    created_at = os.path.getmtime(path)
+    header, separator, body = text.partition("=" * 50 + "\n\n")
+    if separator and header.startswith("Interview Automation Result"):
+        for line in header.splitlines():
+            if line.startswith("Generated on: "):
+                created_at = datetime.strptime(line[len("Generated on: "):], '%Y-%m-%d %H:%M:%S').timestamp()
+        text = body
+    return store.save(text, hash_inputs(legacy_file=os.path.basename(path)), created_at=created_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the interview result store")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    import_parser = subcommands.add_parser('import', help="import results/*.txt files from earlier versions")
+    import_parser.add_argument('paths', nargs='+')
+    export_parser = subcommands.add_parser('export', help="export stored results as gzipped JSONL or a zip archive")
+    export_parser.add_argument('-o', '--output', help="write the export here instead of stdout")
+    export_parser.add_argument('--format', choices=sorted(result_export.FORMATS), default='jsonl')
+    export_parser.add_argument('--since', help="first day or time to include (YYYY-MM-DD or ISO 8601)")
+    export_parser.add_argument('--until', help="last day to include, or a time to stop before")
+    export_parser.add_argument('--inputs-hash', help="only results with this inputs hash")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.command == 'import':
+        for path in args.paths:
+            print(f"📥 {path} -> result {import_text_file(store, path)}")
+        return
+
+    try:
+        since = result_export.parse_time(args.since)
+        until = result_export.parse_time(args.until, end=True)
+    except ValueError as e:
+        parser.error(str(e))
+    records = store.iter_results(since=since, until=until, inputs_hash=args.inputs_hash)
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        count = result_export.write_export(out, records, args.format)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"📦 Exported {count} results", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+import metrics
+
+ALLOWED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+CHUNK_SIZE = 64 * 1024
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+RESUME_EXTRACT_SECONDS = metrics.Histogram('resume_extract_seconds', 'Resume text extraction time by file type',
+                                           ['kind'])
+RESUME_CACHE_LOOKUPS = metrics.Counter('resume_cache_lookups_total', 'Extracted resume cache lookups by result',
+                                       ['result'])
+
+
+class ResumeError(Exception):
+    """Raised for resume uploads that cannot be accepted or read"""
+
+
+def extract_txt(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+def extract_docx(path):
+    """Paragraph text of a .docx, read straight from its document.xml"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            xml = archive.read('word/document.xml')
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ResumeError(f"Not a valid DOCX file: {e}") from e
+    paragraphs = []
+    for paragraph in ElementTree.fromstring(xml).iter(f'{WORD_NS}p'):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f'{WORD_NS}t' and node.text:
+                parts.append(node.text)
+            elif node.tag == f'{WORD_NS}tab':
+                parts.append('\t')
+            elif node.tag in (f'{WORD_NS}br', f'{WORD_NS}cr'):
+                parts.append('\n')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+
+def extract_pdf(path):
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError as e:
+        raise ResumeError("PDF resumes need the pypdf package (pip install pypdf)") from e
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            reader.decrypt('')
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    except PdfReadError as e:
+        raise ResumeError(f"Could not read PDF: {e}") from e
+
+
+EXTRACTORS = {'.txt': extract_txt, '.docx': extract_docx, '.pdf': extract_pdf}
+
+
+def extract_text(path, kind):
+    """Extract and tidy the text of a resume file (runs in a worker process)"""
+    text = EXTRACTORS[kind](path)
+    text = re.sub(r'[ \t]+\n', '\n', text.replace('\r\n', '\n'))
+    text = re.sub(r'\n{3,}', '\n\n', text).strip()
+    if not text:
+        raise ResumeError("No text could be extracted from the resume")
+    return text
+
+
+class UploadedResume:
+    """A resume upload saved to a temporary file, identified by its content hash"""
+
+    def __init__(self, path, kind, sha256, size, filename):
+        self.path = path
+        self.kind = kind
+        self.sha256 = sha256
+        self.size = size
+        self.filename = filename
+
+
+class ResumeExtractor:
+    """Saves resume uploads and extracts their text off the request threads.
+
+    Uploads are streamed to a temporary file in chunks, hashing as they go and
+    rejecting anything over max_bytes. Extraction runs in a process pool so a
+    large PDF never holds the GIL of a web or job worker, and the text is
+    cached on disk by content hash so the same file is only parsed once.
+    Concurrent requests for the same file share one extraction.
+    """
+
+    def __init__(self, cache_dir, max_bytes=10 * 1024 * 1024, max_workers=2, timeout=60, upload_dir=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.upload_dir = upload_dir
+        self._executor = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._counters = {'uploads': 0, 'rejected': 0, 'extractions': 0, 'cache_hits': 0, 'failures': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def save_upload(self, filename, stream):
+        """Copy an uploaded file's stream to a temporary file"""
+        filename = filename or ''
+        kind = os.path.splitext(filename)[1].lower()
+        if kind not in ALLOWED_EXTENSIONS:
+            self._count('rejected')
+            raise ResumeError(f"Unsupported resume type {kind or '(none)'}; use PDF, DOCX or TXT")
+
+        if self.upload_dir:
+            os.makedirs(self.upload_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=kind, prefix='resume-', dir=self.upload_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ResumeError(f"Resume is larger than {self.max_bytes / (1024 * 1024):g} MB")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if size == 0:
+                raise ResumeError("Uploaded resume is empty")
+        except Exception:
+            self._count('rejected')
+            os.remove(path)
+            raise
+        self._count('uploads')
+        return UploadedResume(path, kind, digest.hexdigest(), size, filename)
+
+    def discard(self, upload):
+        try:
+            os.remove(upload.path)
+        except OSError:
+            pass
+
+    def _cache_path(self, sha256):
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}.txt")
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs request and job threads is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def extract(self, upload):
+        """Return the upload's text, from the cache or a worker process; removes the temporary file"""
+        try:
+            return self._extract(upload)
+        finally:
+            self.discard(upload)
+
+    def _extract(self, upload):
+        cache_path = self._cache_path(upload.sha256)
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            pass
+        else:
+            self._count('cache_hits')
+            RESUME_CACHE_LOOKUPS.inc(result='hit')
+            return text
+        RESUME_CACHE_LOOKUPS.inc(result='miss')
+
+        with self._lock:
+            future = self._in_flight.get(upload.sha256)
+            owner = future is None
+        if owner:
+            future = self._pool().submit(extract_text, upload.path, upload.kind)
+            with self._lock:
+                self._in_flight[upload.sha256] = future
+        start = time.perf_counter()
+        try:
+            text = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count('failures')
+            raise ResumeError(f"Resume text extraction took longer than {self.timeout}s")
+        except ResumeError:
+            self._count('failures')
+            raise
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next upload
+            self._count('failures')
+            with self._lock:
+                self._executor = None
+            raise ResumeError(f"Could not extract resume text: {e}") from e
+        except Exception as e:
+            self._count('failures')
+            raise ResumeError(f"Could not extract resume text: {e}") from e
+        finally:
+            if owner:
+                with self._lock:
+                    self._in_flight.pop(upload.sha256, None)
+        if not owner:
+            return text
+
+        RESUME_EXTRACT_SECONDS.observe(time.perf_counter() - start, kind=upload.kind)
+        metrics.add_span('resume_extract', time.perf_counter() - start)
+        self._count('extractions')
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️ Warning: could not cache extracted resume: {e}")
+        return text
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._in_flight)
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_default_extractor = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    """Return the process-wide resume extractor, creating it on first use"""
+    global _default_extractor
+    with _default_extractor_lock:
+        if _default_extractor is None:
+            _default_extractor = ResumeExtractor(
+                cache_dir=os.getenv('RESUME_CACHE_DIR', os.path.join('.cache', 'resumes')),
+                max_bytes=resume_max_bytes(),
+                max_workers=int(os.getenv('RESUME_WORKERS', '2')),
+                timeout=float(os.getenv('RESUME_EXTRACT_TIMEOUT', '60')),
+                upload_dir=os.getenv('UPLOAD_DIR') or None,
+            )
+        return _default_extractor
+
+
+def resume_max_bytes():
+    return int(float(os.getenv('RESUME_MAX_MB', '10')) * 1024 * 1024)
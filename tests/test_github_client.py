@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import github_client
+from github_client import GitHubClient, GitHubRateLimited
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    """GitHub API stand-in: users, paged repos and languages, with ETags and rate-limit headers"""
+
+    repos = 3
+    remaining = 5000
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get('If-None-Match')))
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        params = dict(pair.split('=', 1) for pair in query.split('&') if '=' in pair)
+        if len(parts) == 2 and parts[0] == 'users':
+            body = {'login': parts[1], 'public_repos': self.repos, 'created_at': '2020-01-01T00:00:00Z'}
+        elif len(parts) == 3 and parts[2] == 'repos':
+            per_page = int(params.get('per_page', 30))
+            first = (int(params.get('page', 1)) - 1) * per_page
+            body = [{'name': f"repo-{i}", 'language': 'Python', 'size': 100, 'stargazers_count': i,
+                     'forks_count': 0, 'fork': False, 'pushed_at': '2024-01-01T00:00:00Z'}
+                    for i in range(first, min(first + per_page, self.repos))]
+        elif len(parts) == 4 and parts[3] == 'languages':
+            body = {'Python': 1000}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode('utf-8')
+        etag = '"' + hashlib.sha256(payload).hexdigest()[:16] + '"'
+        self.send_response(304 if self.headers.get('If-None-Match') == etag else 200)
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', str(self.remaining))
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        if self.headers.get('If-None-Match') == etag:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def github():
+    """Base URL of a fresh stub server; its handler class is yielded for configuration"""
+    handler = type('Handler', (StubGitHub,), {'requests': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    handler.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_not_modified_reuses_cached_body(github):
+    client = GitHubClient(base_url=github.url, cache_ttl=0)
+    first = client.get_json('/users/alice')
+    second = client.get_json('/users/alice')
+
+    assert second == first
+    assert github.requests[0][1] is None
+    assert github.requests[1][1] is not None
+    stats = client.stats()
+    assert stats['requests'] == 2
+    assert stats['not_modified'] == 1
+
+
+def test_fresh_cache_entry_skips_the_network(github):
+    client = GitHubClient(base_url=github.url, cache_ttl=300)
+    client.get_json('/users/alice')
+    client.get_json('/users/alice')
+
+    assert len(github.requests) == 1
+    assert client.stats()['cache_hits'] == 1
+
+
+def test_exhausted_rate_limit_stops_requests(github):
+    github.remaining = 0
+    client = GitHubClient(base_url=github.url, cache_ttl=0)
+    user = client.get_json('/users/alice')
+
+    # Blocked until the reset: a cached path is served stale, an unknown one is refused without a request
+    assert client.get_json('/users/alice') == user
+    with pytest.raises(GitHubRateLimited):
+        client.get_json('/users/bob')
+    assert len(github.requests) == 1
+    assert client.stats()['stale_served'] == 1
+
+
+def test_exhausted_rate_limit_gives_partial_profile(github):
+    github.remaining = 0
+    github.repos = 250
+    client = GitHubClient(base_url=github.url)
+    found = client.fetch_profile('alice')
+
+    assert found['user']['login'] == 'alice'
+    assert found['partial']
+    assert not any('/languages' in path for path, _ in github.requests)
+
+
+def test_language_allowance_follows_remaining_rate_limit(github):
+    github.remaining = 40
+    github.repos = 50
+    client = GitHubClient(base_url=github.url, min_remaining=5, max_language_repos=30)
+    assert client._language_allowance() == 30
+
+    found = client.fetch_profile('alice')
+    allowance = 40 - 5 - github_client.RATE_LIMIT_RESERVE
+    assert client._language_allowance() == allowance
+    assert len(found['languages']) == allowance
+    assert sum(1 for path, _ in github.requests if path.endswith('/languages')) == allowance
+
+
+@pytest.mark.parametrize('url, username', [
+    ('https://github.com/alice', 'alice'),
+    ('https://github.com/alice/', 'alice'),
+    ('http://www.github.com/Alice-B', 'Alice-B'),
+    ('https://github.com/alice?tab=repositories', 'alice'),
+    ('https://github.com/alice/project', None),
+    ('https://github.com/alice/project/tree/main', None),
+    ('https://github.com//alice', None),
+    ('https://github.com/', None),
+    ('https://gitlab.com/alice', None),
+    ('github.com/alice', None),
+    ('https://github.com/-alice', None),
+])
+def test_profile_username(url, username):
+    assert github_client.profile_username(url) == username
+
+
+def test_parse_username_takes_last_segment():
+    assert github_client.parse_username(' https://github.com/alice/ ') == 'alice'
+    assert github_client.parse_username('alice') == 'alice'
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from llm_pool import LLMUnavailable
+from model_router import ModelRouter, ModelTier
+
+
+class StubLLM:
+    """LLM stand-in answering with its model name, or failing while its model is in failing"""
+
+    def __init__(self, model, failing):
+        self.model = model
+        self.failing = failing
+
+    def call(self, prompt):
+        if self.model in self.failing:
+            raise RuntimeError(f"{self.model} is down")
+        return f"{self.model}: {prompt}"
+
+
+def make_router(failing, window_seconds=60, min_samples=2, broken=()):
+    def factory(model):
+        if model in broken:
+            raise RuntimeError(f"cannot reach {model}")
+        return StubLLM(model, failing)
+
+    tiers = {'strong': ModelTier('strong', ['primary', 'fallback'])}
+    return ModelRouter(factory, tiers, {'questions': 'strong'},
+                       pool_options={'size': 1, 'max_retries': 0, 'borrow_timeout': 0.1},
+                       window_seconds=window_seconds, min_samples=min_samples)
+
+
+def test_healthy_primary_takes_the_call():
+    router = make_router(failing=set())
+    with router.borrow('strong') as llm:
+        assert llm.call('hi') == 'primary: hi'
+
+
+def test_failed_call_falls_back_to_next_model():
+    router = make_router(failing={'primary'})
+    with router.borrow('strong') as llm:
+        assert llm.call('hi') == 'fallback: hi'
+    assert router.pool('primary').health.snapshot()['errors'] == 1
+
+
+def test_failing_model_is_demoted_then_recovers_after_window():
+    failing = {'primary'}
+    router = make_router(failing, window_seconds=0.3)
+    tier = router.tiers['strong']
+    for _ in range(2):
+        with router.borrow('strong') as llm:
+            assert llm.call('hi') == 'fallback: hi'
+    assert router.degraded('primary', tier) == 'error_rate'
+    assert [model for model, _ in router.candidates(tier)] == ['fallback', 'primary']
+    assert router.stats()['tiers']['strong']['shed'] == {'primary': 'error_rate'}
+
+    # Demoted: calls go to the fallback first, so the primary is not tried even once it works again
+    failing.clear()
+    with router.borrow('strong') as llm:
+        assert llm.call('hi') == 'fallback: hi'
+
+    time.sleep(0.35)
+    assert router.degraded('primary', tier) is None
+    with router.borrow('strong') as llm:
+        assert llm.call('hi') == 'primary: hi'
+
+
+def test_call_failing_on_every_model_raises_last_error():
+    router = make_router(failing={'primary', 'fallback'})
+    with router.borrow('strong') as llm:
+        with pytest.raises(RuntimeError, match='fallback is down'):
+            llm.call('hi')
+
+
+def test_borrow_skips_model_whose_clients_cannot_be_created():
+    router = make_router(failing=set(), broken={'primary'})
+    with router.borrow('strong') as llm:
+        assert llm.call('hi') == 'fallback: hi'
+
+
+def test_borrow_raises_llm_unavailable_when_no_model_has_a_client():
+    router = make_router(failing=set(), broken={'primary', 'fallback'})
+    with pytest.raises(LLMUnavailable):
+        with router.borrow('strong'):
+            pass
+
+
+def test_undefined_stage_tier_is_rejected():
+    with pytest.raises(ValueError, match='undefined model tiers'):
+        ModelRouter(StubLLM, {'fast': ModelTier('fast', ['a'])}, {'answers': 'strong'})
@@ -0,0 +1,99 @@
+import pytest
+
+import pipeline
+from pipeline import count_numbered_lines, parse_questions
+
+CATEGORY_HEADINGS = """**1. Technical Skills (5-6 questions)**
+1. What is a Python generator?
+2. Explain database indexing.
+
+**2. Behavioral (2-3 questions)**
+1. Tell me about a conflict in your team.
+"""
+
+BOLD_NUMBERED_HEADINGS = """**1. Technical Skills**
+1. What is a Python generator?
+2. Explain database indexing.
+**2. Behavioral**
+1. Tell me about a conflict in your team.
+"""
+
+PLAIN_HEADINGS = """Technical Skills
+1. What is a Python generator?
+2. Explain database indexing.
+
+Behavioral
+3. Tell me about a conflict in your team.
+"""
+
+BOLD_QUESTIONS = """**1. Describe your experience with Python async frameworks.**
+**2. How do you test code?**
+"""
+
+CONTINUATION_LINES = """### Technical
+1. **What is a Python generator?**
+   Give an example from your own work.
+2. Explain database indexing.
+
+Behavioral:
+3. Tell me about a conflict in your team.
+"""
+
+THREE_QUESTIONS = ['What is a Python generator?', 'Explain database indexing.', 'Tell me about a conflict in your team.']
+
+
+@pytest.mark.parametrize('text', [CATEGORY_HEADINGS, BOLD_NUMBERED_HEADINGS, PLAIN_HEADINGS])
+def test_headings_are_skipped(text):
+    assert parse_questions(text) == THREE_QUESTIONS
+    assert count_numbered_lines(text) == 3
+
+
+def test_bold_questions_are_kept():
+    assert parse_questions(BOLD_QUESTIONS) == ['Describe your experience with Python async frameworks.',
+                                              'How do you test code?']
+    assert count_numbered_lines(BOLD_QUESTIONS) == 2
+
+
+def test_continuation_lines_are_joined():
+    questions = parse_questions(CONTINUATION_LINES)
+    assert questions[0] == 'What is a Python generator? Give an example from your own work.'
+    assert len(questions) == 3
+    assert count_numbered_lines(CONTINUATION_LINES) == 3
+
+
+def test_unreadable_numbering_is_counted():
+    text = "1. What is a Python generator?\nQ2: Explain database indexing.\n3. Tell me about a conflict."
+    assert len(parse_questions(text)) == 2
+    assert count_numbered_lines(text) == 3
+
+
+def answer_stubs(monkeypatch):
+    calls = {'batches': [], 'single': 0}
+
+    def answer_question_batch(llm, numbered_questions, candidate_profile, accounting=None):
+        calls['batches'].append([number for number, _ in numbered_questions])
+        return "\n".join(f"**Q: {number}. {question}**\n**A:** ok" for number, question in numbered_questions)
+
+    def generate_answers(llm, questions, candidate_profile, accounting=None):
+        calls['single'] += 1
+        return "**Q: 1. all**\n**A:** ok"
+
+    monkeypatch.setattr(pipeline, 'answer_question_batch', answer_question_batch)
+    monkeypatch.setattr(pipeline, 'generate_answers', generate_answers)
+    monkeypatch.setattr(pipeline, 'ANSWER_BATCH_SIZE', 2)
+    return calls
+
+
+def test_bold_numbered_headings_keep_batching(monkeypatch):
+    calls = answer_stubs(monkeypatch)
+    answers = pipeline.answer_questions(None, BOLD_NUMBERED_HEADINGS, 'profile')
+    assert calls['single'] == 0
+    assert sorted(calls['batches']) == [[1, 2], [3]]
+    assert answers.index('Q: 1.') < answers.index('Q: 3.')
+
+
+def test_unparsed_questions_fall_back_to_one_task(monkeypatch):
+    calls = answer_stubs(monkeypatch)
+    pipeline.answer_questions(None, "1. What is X?\nQ2: Explain Y.\n3. Tell me about Z.", 'profile')
+    assert calls['single'] == 1
+    assert calls['batches'] == []
@@ -0,0 +1,148 @@
+import math
+import os
+import re
+import threading
+
+# Rough characters-per-token ratio for English prose and markdown under Gemini/GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+# Default prompt budgets (in estimated tokens) per stage; 0 disables the budget
+DEFAULT_BUDGETS = {
+    'recruiter_profile': 1500,
+    'candidate_profile': 4000,
+    'questions': 4000,
+    'answers': 3000,
+}
+
+# Never compact an upstream part below this many tokens
+MIN_PART_TOKENS = 200
+
+ELLIPSIS_MARKER = '[...]'
+
+BULLET_RE = re.compile(r'^\s*([-*•]|\d+[.)])\s+')
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting; avoids loading a tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def load_budgets():
+    """Per-stage budgets, overridable with TOKEN_BUDGET_<STAGE> environment variables"""
+    budgets = dict(DEFAULT_BUDGETS)
+    for stage in budgets:
+        value = os.getenv(f"TOKEN_BUDGET_{stage.upper()}")
+        if value is not None:
+            budgets[stage] = int(value)
+    return budgets
+
+
+def _line_priority(line):
+    """Headings first, then bullets, then running prose"""
+    stripped = line.strip()
+    if stripped.startswith('#') or (stripped.startswith('**') and stripped.endswith('**')) or stripped.endswith(':'):
+        return 0
+    if BULLET_RE.match(line):
+        return 1
+    return 2
+
+
+def compact_text(text, max_tokens):
+    """Trim text to roughly max_tokens, keeping its structure.
+
+    Whitespace is normalized first. If that is not enough, headings and bullet
+    points are kept in preference to prose, overly long lines are shortened,
+    and dropped runs of lines are marked with '[...]'.
+    """
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text).strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    max_line_chars = max(80, max_chars // 10)
+    lines = [line if len(line) <= max_line_chars else line[:max_line_chars].rstrip() + '…'
+             for line in text.split('\n')]
+
+    # Each kept line may be followed by a '[...]' marker, so reserve room for one
+    keep = set()
+    used = len(ELLIPSIS_MARKER) + 1
+    for index in sorted(range(len(lines)), key=lambda i: (_line_priority(lines[i]), i)):
+        cost = len(lines[index]) + len(ELLIPSIS_MARKER) + 2
+        if used + cost > max_chars:
+            continue
+        keep.add(index)
+        used += cost
+
+    compacted = []
+    for index, line in enumerate(lines):
+        if index in keep:
+            compacted.append(line)
+        elif not compacted or compacted[-1] != ELLIPSIS_MARKER:
+            compacted.append(ELLIPSIS_MARKER)
+    return '\n'.join(compacted)
+
+
+class TokenAccounting:
+    """Per-run record of prompt sizes against per-stage budgets.
+
+    fit() is called just before a stage is dispatched: it estimates the prompt
+    size, compacts the largest upstream parts when the stage is over budget,
+    and records the tokens before and after so the savings show up per run.
+    A stage dispatched as several calls (e.g. answer batches) is budgeted per
+    call and its counts are summed.
+    """
+
+    def __init__(self, budgets=None):
+        self.budgets = load_budgets() if budgets is None else budgets
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def fit(self, stage, fixed_text, parts):
+        """Return parts compacted so that fixed_text plus parts fits the stage budget"""
+        parts = list(parts)
+        fixed = estimate_tokens(fixed_text)
+        sizes = [estimate_tokens(part) for part in parts]
+        original = fixed + sum(sizes)
+        budget = self.budgets.get(stage) or 0
+
+        if budget and original > budget:
+            # Water-fill the remaining budget: small parts keep everything,
+            # larger ones share what is left equally
+            available = max(budget - fixed, MIN_PART_TOKENS * len(parts))
+            allocation = [0] * len(parts)
+            remaining = list(range(len(parts)))
+            for index in sorted(remaining, key=lambda i: sizes[i]):
+                share = available // len(remaining)
+                allocation[index] = max(min(sizes[index], share), MIN_PART_TOKENS)
+                available -= min(allocation[index], available)
+                remaining.remove(index)
+            parts = [compact_text(part, allocation[i]) if sizes[i] > allocation[i] else part
+                     for i, part in enumerate(parts)]
+
+        final = fixed + sum(estimate_tokens(part) for part in parts)
+        with self._lock:
+            info = self.stages.setdefault(stage, {'calls': 0, 'prompt_tokens': 0, 'original_tokens': 0,
+                                                  'saved_tokens': 0, 'budget': budget or None,
+                                                  'compacted': False})
+            info['calls'] += 1
+            info['prompt_tokens'] += final
+            info['original_tokens'] += original
+            info['saved_tokens'] += original - final
+            info['compacted'] = info['compacted'] or final < original
+        return parts
+
+    def copy(self):
+        clone = TokenAccounting(self.budgets)
+        with self._lock:
+            clone.stages = {stage: dict(info) for stage, info in self.stages.items()}
+        return clone
+
+    def report(self):
+        with self._lock:
+            stages = {stage: dict(info) for stage, info in self.stages.items()}
+        return {
+            'stages': stages,
+            'prompt_tokens': sum(info['prompt_tokens'] for info in stages.values()),
+            'saved_tokens': sum(info['saved_tokens'] for info in stages.values()),
+        }